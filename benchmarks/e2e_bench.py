@@ -0,0 +1,236 @@
+"""
+Offline end-to-end benchmark for volt.
+
+Starts the local stand-ins from mock_services.py (OpenAI, Netlify, GitHub),
+points streamlit_app.py at them through its secrets and measures the hot
+paths, then compares the medians with benchmarks/baseline.json.
+
+    python benchmarks/e2e_bench.py                       # run and compare with the baseline
+    python benchmarks/e2e_bench.py --save-baseline       # run and store the result as the baseline
+    python benchmarks/e2e_bench.py --fixtures recorded/  # replay recorded streams (*.jsonl)
+
+Metrics (seconds, median of --repeat runs):
+  ttft_s             request sent -> first answer token (the answer_stream_gen call)
+  time_to_preview_s  request sent -> first partial HTML from StreamingHTMLExtractor
+  stream_s           request sent -> stream finished
+  extract_s          extract_html_from_markdown on the full answer
+  zip_s              zipping index.html, as zip_from_html_str does
+  build_s            volt.build.build_site
+  rerun_s            one idle rerun of streamlit_app.py
+  chat_turn_s        one chat turn through streamlit_app.py, stream included
+  deploy_s           Deploy click -> deploy job finished, first deploy of a new site
+  redeploy_s         Deploy click -> deploy job finished, same content again
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import openai  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from mock_services import GitHubMock, NetlifyMock, OpenAIMock, load_fixtures, synthetic_events  # noqa: E402
+from volt import tracing  # noqa: E402
+from volt.build import build_site  # noqa: E402
+from volt.extract import StreamingHTMLExtractor, extract_html_from_markdown  # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline.json")
+# The app's caches, sessions and spans go here rather than into the real .volt/
+CACHE_DIR = tempfile.mkdtemp(prefix="volt-bench-")
+SPANS = os.path.join(CACHE_DIR, "spans.jsonl")  # the app's SPANS_PATH
+PROMPT = "generate a beautiful web app in pure html/js"
+NOISE_FLOOR_S = 0.005  # differences below this are never reported as regressions
+# Deploy polling starts this often instead of every second: with the poll's random
+# jitter, deploy_s would otherwise measure mostly the sleep
+NETLIFY_POLL_INTERVAL_S = 0.02
+
+
+def sample_answer(size=8 * 1024):
+    with open(os.path.join(ROOT, "default_index.html"), encoding="utf-8") as f:
+        page = f.read()
+    head, _, body = page.partition("<body")
+    sections = []
+    while len(head) + sum(map(len, sections)) < size:
+        sections.append(f"<section id=\"s{len(sections)}\"><body{body}</section>\n")
+    return ("Here is your app, a single HTML file with inline CSS and JS:\n\n"
+            f"```html\n{head}{''.join(sections)}\n```\n\nOpen it in a browser to try it.")
+
+
+def bench_stream(base_url, repeat):
+    client = openai.OpenAI(base_url=f"{base_url}/v1/", api_key="bench")
+    results = {"ttft_s": [], "time_to_preview_s": [], "stream_s": [], "extract_s": [], "zip_s": [], "build_s": []}
+    for _ in range(repeat):
+        live_html, answer = StreamingHTMLExtractor(), []
+        ttft = preview = None
+        start = time.perf_counter()
+        with client.responses.stream(model="gpt-5-nano", input=[{"role": "user", "content": PROMPT}],
+                                     reasoning={"effort": "medium", "summary": "auto"}) as stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    ttft = ttft or time.perf_counter() - start
+                    answer.append(event.delta)
+                    if live_html.feed(event.delta) and preview is None:
+                        preview = time.perf_counter() - start
+            stream.get_final_response()
+        results["stream_s"].append(time.perf_counter() - start)
+        results["ttft_s"].append(ttft)
+        results["time_to_preview_s"].append(preview)
+
+        text = "".join(answer)
+        t = time.perf_counter()
+        html = extract_html_from_markdown(text)
+        results["extract_s"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("index.html", html)
+        results["zip_s"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        build_site(html)
+        results["build_s"].append(time.perf_counter() - t)
+    return results
+
+
+def app_test(urls):
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=120)
+    at.secrets["OPENAI_API_KEY"] = "bench"
+    at.secrets["OPENAI_BASE_URL"] = f"{urls['openai']}/v1/"
+    at.secrets["NETLIFY_PAT"] = "bench"
+    at.secrets["NETLIFY_TEAM_SLUG"] = "bench"
+    at.secrets["NETLIFY_API_BASE"] = f"{urls['netlify']}/api/v1"
+    at.secrets["NETLIFY_POLL_INTERVAL_S"] = NETLIFY_POLL_INTERVAL_S
+    at.secrets["GITHUB_API_BASE"] = urls["github"]
+    at.secrets["VOLT_CACHE_DIR"] = CACHE_DIR
+    at.secrets["NETLIFY_OAUTH_CLIENT_ID"] = "bench"
+    at.secrets["NETLIFY_OAUTH_CLIENT_SECRET"] = "bench"
+    at.secrets["auth"] = {"domain": "auth.invalid", "client_id": "bench", "client_secret": "bench"}
+    return at
+
+
+def click(at, label):
+    next(b for b in at.button if b.label == label).click().run()
+
+
+def wait_for_deploy(at, since, timeout_s=120):
+    """
+    Wait for the deploy job started after `since` to finish, then rerun the
+    app until it has taken the result. Returns when the job finished (end
+    of its deploy.total span): whether the app noticed one rerun sooner or
+    later would otherwise decide most of a redeploy's time.
+    """
+    deadline = time.time() + timeout_s
+    while not (done := [s for s in tracing.load(SPANS, since=since) if s["name"] == "deploy.total"]):
+        if time.time() > deadline:
+            raise TimeoutError("deploy did not finish")
+        time.sleep(0.01)
+    while at.session_state.deploy_job is not None:
+        if time.time() > deadline:
+            raise TimeoutError("deploy result not shown")
+        at.run()
+    return done[0]["ts"] + done[0]["duration_s"]
+
+
+def bench_app(urls, repeat):
+    results = {"rerun_s": [], "chat_turn_s": [], "deploy_s": [], "redeploy_s": []}
+    for _ in range(repeat):
+        at = app_test(urls)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+        t = time.perf_counter()
+        at.chat_input[0].set_value(PROMPT).run()
+        results["chat_turn_s"].append(time.perf_counter() - t)
+
+        for _ in range(5):
+            t = time.perf_counter()
+            at.run()
+            results["rerun_s"].append(time.perf_counter() - t)
+
+        for key in ("deploy_s", "redeploy_s"):
+            since = time.time()
+            click(at, "🚀 Deploy App")
+            results[key].append(wait_for_deploy(at, since) - since)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return results
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    print(f"{'metric':<20}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, value in current.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<20}{'-':>12}{value:>12.4f}")
+            continue
+        change = (value - base) / base if base else 0.0
+        flag = ""
+        if value > base * (1 + tolerance) and value - base > NOISE_FLOOR_S:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<20}{base:>12.4f}{value:>12.4f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for volt.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixtures", help="directory of recorded Responses API streams (*.jsonl)")
+    parser.add_argument("--tokens-per-second", type=float, default=2000)
+    parser.add_argument("--first-token-s", type=float, default=0.3, help="delay before the first streamed token")
+    parser.add_argument("--latency-s", type=float, default=0.01, help="added to every mock HTTP request")
+    parser.add_argument("--build-s", type=float, default=1.0, help="Netlify Build API build time")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. the baseline")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    streams = load_fixtures(args.fixtures) if args.fixtures else [
+        synthetic_events(sample_answer(), reasoning="Planning the layout, then the styles and the script. " * 5)]
+    mocks = {
+        "openai": OpenAIMock(streams, tokens_per_second=args.tokens_per_second,
+                             first_token_s=args.first_token_s, latency_s=args.latency_s),
+        "netlify": NetlifyMock(build_s=args.build_s, process_s=0.2, latency_s=args.latency_s),
+        "github": GitHubMock(latency_s=args.latency_s),
+    }
+    urls = {name: mock.start() for name, mock in mocks.items()}
+    os.chdir(ROOT)  # the app reads its prompt files relative to the working directory
+    try:
+        samples = bench_stream(urls["openai"], args.repeat)
+        samples.update(bench_app(urls, args.repeat))
+    finally:
+        for mock in mocks.values():
+            mock.stop()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    current = {name: statistics.median(values) for name, values in samples.items()}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({k: round(v, 6) for k, v in current.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance)
+    if regressions and not args.save_baseline:
+        sys.exit(f"Regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark for volt.extract.extract_html_from_markdown.
+
+Compares the fence scanner with the regex implementation it replaced,
+checks both return the same block for every document, and prints the
+per-document timings.
+
+    python benchmarks/extract_html_bench.py                  # built-in corpus
+    python benchmarks/extract_html_bench.py --corpus answers/ # saved model answers (*.md, *.txt)
+
+The built-in corpus wraps the repo's HTML files in model-style answers
+(prose + ```html fence + notes), scaled to 50-200 KB, plus malformed
+answers: unclosed fences and long runs of stray `<`.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+from volt.extract import extract_html_from_markdown  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+def legacy_extract_html_from_markdown(text):
+    """
+    The regex implementation from before volt.extract, kept as the reference.
+    """
+    patterns = [
+        r'```(?:html)?\n(.*?)\n```',
+        r'`{3,}(.*?)`{3,}',
+    ]
+    for pattern in patterns:
+        for match in re.finditer(pattern, text, re.DOTALL):
+            content = match.group(1).strip()
+            if content.lower().startswith(('<!doctype', '<html', '<head', '<body')):
+                return content
+            if legacy_contains_html(content):
+                return content
+    return None
+
+
+def legacy_contains_html(text):
+    html_patterns = [
+        r'<!doctype\s+html.*?>',
+        r'<html.*?>.*?</html>',
+        r'<body.*?>.*?</body>',
+        r'<head.*?>.*?</head>',
+        r'<[^>]+>',
+    ]
+    return any(re.search(pattern, text, re.IGNORECASE | re.DOTALL) for pattern in html_patterns)
+
+
+def scale_html(html, size):
+    """
+    Grow a page to about `size` bytes by repeating its body.
+    """
+    head, sep, rest = html.partition('<body')
+    body = sep + rest
+    chunks = [head]
+    while sum(map(len, chunks)) < size:
+        chunks.append(f"<section data-copy=\"{len(chunks)}\">{body}</section>\n")
+    return "".join(chunks)
+
+
+def builtin_corpus():
+    with open(os.path.join(ROOT, 'default_index.html'), encoding='utf-8') as f:
+        page = f.read()
+    corpus = {}
+    for kb in (2, 50, 100, 200):
+        html = scale_html(page, kb * 1024)
+        corpus[f"answer-{kb}kb"] = (
+            "Here is your app! It is a single file with inline CSS and JS.\n\n"
+            f"```html\n{html}\n```\n\n"
+            "Open it in a browser. Tell me if you want a different color scheme."
+        )
+        corpus[f"unclosed-fence-{kb}kb"] = f"Sure:\n```html\n{html}"
+        corpus[f"bare-fence-{kb}kb"] = f"````\n{html}\n````"
+    corpus["stray-lt-50kb"] = "```\n" + "a < b " * 8500 + "\n```"
+    corpus["many-small-fences"] = "\n".join(f"```js\nlet x{i} = {i};\n```" for i in range(5000)) + "\n```html\n<p>end</p>\n```"
+    return corpus
+
+
+def load_corpus(path):
+    corpus = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith(('.md', '.txt')):
+            with open(os.path.join(path, name), encoding='utf-8') as f:
+                corpus[name] = f.read()
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="directory of saved model answers (*.md, *.txt)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else builtin_corpus()
+    mismatches = 0
+    print(f"{'document':<24}{'size':>10}{'regex ms':>12}{'scanner ms':>12}{'speedup':>10}")
+    for name, text in corpus.items():
+        expected = legacy_extract_html_from_markdown(text)
+        if extract_html_from_markdown(text) != expected:
+            mismatches += 1
+            print(f"MISMATCH: {name}")
+        old = min(timeit.repeat(lambda: legacy_extract_html_from_markdown(text), number=1, repeat=args.repeat))
+        new = min(timeit.repeat(lambda: extract_html_from_markdown(text), number=1, repeat=args.repeat))
+        print(f"{name:<24}{len(text):>10}{old * 1000:>12.2f}{new * 1000:>12.2f}{old / new:>9.1f}x")
+    if mismatches:
+        sys.exit(f"{mismatches} document(s) extracted differently")
+
+
+if __name__ == "__main__":
+    main()
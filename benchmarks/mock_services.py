@@ -0,0 +1,442 @@
+"""
+Local stand-ins for the services volt talks to, for offline benchmarks.
+
+- OpenAIMock: POST /v1/responses replays Responses API event streams
+  (server-sent events), reasoning-summary deltas included, at a
+  configurable token rate. Streams are lists of events as sent by the API,
+  loaded from *.jsonl fixtures or built by synthetic_events().
+- NetlifyMock: /sites, /builds and /deploys with the deploy state machine
+  (digest deploys with `required` files, ZIP and Build API deploys).
+- GitHubMock: repos, contents and Git Data (blobs/trees/commits/refs).
+
+Every mock runs a ThreadingHTTPServer on 127.0.0.1 in a daemon thread;
+start() returns its base URL. `latency_s` is added to every request to
+stand in for the network round-trip.
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class MockService:
+    routes = []  # (method, regex, handler method name)
+
+    def __init__(self, latency_s=0.0):
+        self.latency_s = latency_s
+        self.lock = threading.Lock()
+        self.requests = []  # (method, path) of every request, for assertions and counts
+        self.server = None
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                service.dispatch(self, "GET")
+
+            def do_POST(self):
+                service.dispatch(self, "POST")
+
+            def do_PUT(self):
+                service.dispatch(self, "PUT")
+
+            def do_PATCH(self):
+                service.dispatch(self, "PATCH")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def dispatch(self, handler, method):
+        url = urlsplit(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        with self.lock:
+            self.requests.append((method, url.path))
+        time.sleep(self.latency_s)
+        for route_method, pattern, name in self.routes:
+            m = re.fullmatch(pattern, url.path)
+            if route_method == method and m:
+                req = {"headers": handler.headers, "body": body, "query": parse_qs(url.query),
+                       "args": [unquote(a) for a in m.groups()]}
+                result = getattr(self, name)(req, handler)
+                if result is not None:
+                    self.reply(handler, *result)
+                return
+        self.reply(handler, 404, {"message": "Not Found"})
+
+    @staticmethod
+    def reply(handler, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    @staticmethod
+    def json(req):
+        return json.loads(req["body"] or b"{}")
+
+
+# --- OpenAI -------------------------------------------------------------------
+
+DELTA_EVENTS = ("response.output_text.delta", "response.reasoning_summary_text.delta")
+
+
+def split_tokens(text, chars_per_token=4):
+    return [text[i:i + chars_per_token] for i in range(0, len(text), chars_per_token)]
+
+
+def synthetic_events(answer, reasoning="", model="gpt-5-nano"):
+    """
+    A complete Responses API event sequence, in the order the API sends it,
+    for a reply with an optional reasoning summary followed by `answer`.
+    """
+    resp_id, seq = f"resp_{uuid.uuid4().hex}", itertools.count()
+    response = {"id": resp_id, "object": "response", "created_at": int(time.time()), "model": model,
+                "status": "in_progress", "output": [], "parallel_tool_calls": True,
+                "tool_choice": "auto", "tools": [], "temperature": 1.0, "top_p": 1.0}
+    events = [{"type": "response.created", "response": response},
+              {"type": "response.in_progress", "response": response}]
+    output = []
+    if reasoning:
+        rs = {"id": "rs_1", "type": "reasoning", "summary": []}
+        part = {"type": "summary_text", "text": ""}
+        events += [{"type": "response.output_item.added", "output_index": 0, "item": rs},
+                   {"type": "response.reasoning_summary_part.added", "item_id": "rs_1", "output_index": 0,
+                    "summary_index": 0, "part": part}]
+        events += [{"type": "response.reasoning_summary_text.delta", "item_id": "rs_1", "output_index": 0,
+                    "summary_index": 0, "delta": tok} for tok in split_tokens(reasoning)]
+        done = {**rs, "summary": [{"type": "summary_text", "text": reasoning}]}
+        events += [{"type": "response.reasoning_summary_text.done", "item_id": "rs_1", "output_index": 0,
+                    "summary_index": 0, "text": reasoning},
+                   {"type": "response.reasoning_summary_part.done", "item_id": "rs_1", "output_index": 0,
+                    "summary_index": 0, "part": {"type": "summary_text", "text": reasoning}},
+                   {"type": "response.output_item.done", "output_index": 0, "item": done}]
+        output.append(done)
+    idx = len(output)
+    msg = {"id": "msg_1", "type": "message", "role": "assistant", "status": "in_progress", "content": []}
+    text_part = {"type": "output_text", "text": "", "annotations": []}
+    events += [{"type": "response.output_item.added", "output_index": idx, "item": msg},
+               {"type": "response.content_part.added", "item_id": "msg_1", "output_index": idx,
+                "content_index": 0, "part": text_part}]
+    events += [{"type": "response.output_text.delta", "item_id": "msg_1", "output_index": idx,
+                "content_index": 0, "delta": tok, "logprobs": []} for tok in split_tokens(answer)]
+    final_part = {**text_part, "text": answer}
+    final_msg = {**msg, "status": "completed", "content": [final_part]}
+    output.append(final_msg)
+    events += [{"type": "response.output_text.done", "item_id": "msg_1", "output_index": idx,
+                "content_index": 0, "text": answer, "logprobs": []},
+               {"type": "response.content_part.done", "item_id": "msg_1", "output_index": idx,
+                "content_index": 0, "part": final_part},
+               {"type": "response.output_item.done", "output_index": idx, "item": final_msg},
+               {"type": "response.completed", "response": {**response, "status": "completed", "output": output}}]
+    for event in events:
+        event["sequence_number"] = next(seq)
+    return events
+
+
+def load_fixtures(path):
+    """
+    Recorded streams: one *.jsonl file per response, one event per line.
+    """
+    fixtures = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".jsonl"):
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                fixtures.append([json.loads(line) for line in f if line.strip()])
+    return fixtures
+
+
+class OpenAIMock(MockService):
+    routes = [("POST", r"/v1/responses", "responses")]
+
+    def __init__(self, streams, tokens_per_second=1000.0, first_token_s=0.3, **kwargs):
+        super().__init__(**kwargs)
+        self.streams = itertools.cycle(streams)
+        self.tokens_per_second = tokens_per_second
+        self.first_token_s = first_token_s
+
+    def responses(self, req, handler):
+        with self.lock:
+            events = next(self.streams)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        first = True
+        for event in events:
+            if event["type"] in DELTA_EVENTS:
+                time.sleep(self.first_token_s if first else 1 / self.tokens_per_second)
+                first = False
+            handler.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+        handler.close_connection = True
+
+
+# --- Netlify ------------------------------------------------------------------
+
+class NetlifyMock(MockService):
+    routes = [
+        ("GET", r"/api/v1/sites", "list_sites"),
+        ("GET", r"/api/v1/([^/]+)/sites", "list_team_sites"),
+        ("GET", r"/api/v1/sites/([^/]+)", "get_site"),
+        ("POST", r"/api/v1/sites", "create_site"),
+        ("POST", r"/api/v1/sites/([^/]+)/deploys", "create_deploy"),
+        ("POST", r"/api/v1/sites/([^/]+)/builds", "create_build"),
+        ("PUT", r"/api/v1/deploys/([^/]+)/files/(.+)", "upload_file"),
+        ("GET", r"/api/v1/deploys/([^/]+)", "get_deploy"),
+    ]
+
+    def __init__(self, build_s=2.0, process_s=0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.build_s = build_s
+        self.process_s = process_s
+        self.sites = {}    # id -> site
+        self.deploys = {}  # id -> deploy (with private _ready_at)
+        self.blobs = set() # sha1 of every file already uploaded
+
+    def _site_json(self, site):
+        return {k: v for k, v in site.items() if not k.startswith("_")}
+
+    def _deploy_json(self, deploy):
+        if deploy["_ready_at"] is not None and time.time() >= deploy["_ready_at"]:
+            deploy["state"] = "ready"
+        return {k: v for k, v in deploy.items() if not k.startswith("_")}
+
+    def list_sites(self, req, handler):
+        page = int(req["query"].get("page", ["1"])[0])
+        per_page = int(req["query"].get("per_page", ["100"])[0])
+        sites = list(self.sites.values())[(page - 1) * per_page:page * per_page]
+        return 200, [self._site_json(s) for s in sites]
+
+    def list_team_sites(self, req, handler):
+        return self.list_sites(req, handler)
+
+    def get_site(self, req, handler):
+        key = req["args"][0]
+        for site in self.sites.values():
+            if key in (site["id"], f"{site['name']}.netlify.app"):
+                return 200, {**self._site_json(site), "published_deploy": self._published(site["id"])}
+        return 404, {"message": "Not Found"}
+
+    def _published(self, site_id):
+        """
+        The site's most recent ready deploy, as Netlify's published_deploy.
+        """
+        ready = [d for d in list(self.deploys.values())
+                 if d["site_id"] == site_id and self._deploy_json(d)["state"] == "ready"]
+        return self._deploy_json(max(ready, key=lambda d: d["_ready_at"])) if ready else None
+
+    def create_site(self, req, handler):
+        payload = self.json(req)
+        name = payload.get("name") or uuid.uuid4().hex[:8]
+        if any(s["name"] == name for s in self.sites.values()):
+            return 422, {"errors": {"subdomain": ["must be unique"]}}
+        site_id = str(uuid.uuid4())
+        url = f"http://{name}.netlify.app"
+        self.sites[site_id] = {"id": site_id, "name": name, "url": url, "ssl_url": url.replace("http:", "https:"),
+                               "account_slug": payload.get("account_slug")}
+        return 201, self._site_json(self.sites[site_id])
+
+    def _new_deploy(self, site_id, state, ready_in=None, required=()):
+        site = self.sites[site_id]
+        deploy_id = uuid.uuid4().hex
+        self.deploys[deploy_id] = {
+            "id": deploy_id, "site_id": site_id, "state": state, "required": list(required),
+            "url": site["url"], "ssl_url": site["ssl_url"],
+            "_ready_at": None if ready_in is None else time.time() + ready_in,
+            "_pending": set(required),
+        }
+        return self.deploys[deploy_id]
+
+    def create_deploy(self, req, handler):
+        site_id = req["args"][0]
+        if site_id not in self.sites:
+            return 404, {"message": "Not Found"}
+        if req["headers"].get("Content-Type", "").startswith("application/zip"):
+            deploy = self._new_deploy(site_id, "processing", ready_in=self.process_s)
+        else:
+            files = self.json(req).get("files", {})
+            with self.lock:
+                required = sorted({sha for sha in files.values() if sha not in self.blobs})
+            deploy = self._new_deploy(site_id, "uploading" if required else "processing",
+                                      ready_in=None if required else self.process_s, required=required)
+        return 200, self._deploy_json(deploy)
+
+    def create_build(self, req, handler):
+        site_id = req["args"][0]
+        if site_id not in self.sites:
+            return 404, {"message": "Not Found"}
+        deploy = self._new_deploy(site_id, "building", ready_in=self.build_s)
+        return 200, {"id": uuid.uuid4().hex, "deploy_id": deploy["id"], "done": False}
+
+    def upload_file(self, req, handler):
+        deploy = self.deploys.get(req["args"][0])
+        if deploy is None:
+            return 404, {"message": "Not Found"}
+        sha = hashlib.sha1(req["body"]).hexdigest()
+        with self.lock:
+            self.blobs.add(sha)
+            deploy["_pending"].discard(sha)
+            if not deploy["_pending"] and deploy["_ready_at"] is None:
+                deploy["state"] = "processing"
+                deploy["_ready_at"] = time.time() + self.process_s
+        return 200, {"id": sha, "path": "/" + req["args"][1]}
+
+    def get_deploy(self, req, handler):
+        deploy = self.deploys.get(req["args"][0])
+        if deploy is None:
+            return 404, {"message": "Not Found"}
+        return 200, self._deploy_json(deploy)
+
+
+# --- GitHub -------------------------------------------------------------------
+
+def git_sha(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class GitHubMock(MockService):
+    routes = [
+        ("POST", r"/user/repos", "create_repo"),
+        ("GET", r"/repos/([^/]+)/([^/]+)", "get_repo"),
+        ("GET", r"/repos/([^/]+)/([^/]+)/contents/(.+)", "get_contents"),
+        ("PUT", r"/repos/([^/]+)/([^/]+)/contents/(.+)", "put_contents"),
+        ("GET", r"/repos/([^/]+)/([^/]+)/commits/([^/]+)", "get_commit"),
+        ("POST", r"/repos/([^/]+)/([^/]+)/git/blobs", "create_blob"),
+        ("GET", r"/repos/([^/]+)/([^/]+)/git/trees/([^/]+)", "get_tree"),
+        ("POST", r"/repos/([^/]+)/([^/]+)/git/trees", "create_tree"),
+        ("POST", r"/repos/([^/]+)/([^/]+)/git/commits", "create_commit"),
+        ("PATCH", r"/repos/([^/]+)/([^/]+)/git/refs/heads/(.+)", "update_ref"),
+    ]
+
+    def __init__(self, owner="volt-bench", **kwargs):
+        super().__init__(**kwargs)
+        self.owner = owner
+        self.repos = {}  # "owner/name" -> {"blobs", "trees", "commits", "refs", "default_branch"}
+
+    def _repo(self, req):
+        return self.repos.get(f"{req['args'][0]}/{req['args'][1]}")
+
+    def _commit(self, repo, tree, parents, message):
+        commit = {"tree": tree, "parents": parents, "message": message}
+        sha = git_sha(commit)
+        repo["commits"][sha] = commit
+        return sha
+
+    def _tree(self, repo, files):
+        sha = git_sha(files)
+        repo["trees"][sha] = dict(files)
+        return sha
+
+    def create_repo(self, req, handler):
+        payload = self.json(req)
+        key = f"{self.owner}/{payload['name']}"
+        if key in self.repos:
+            return 422, {"message": "name already exists on this account"}
+        repo = self.repos[key] = {"blobs": {}, "trees": {}, "commits": {}, "refs": {}, "default_branch": "main"}
+        if payload.get("auto_init"):
+            readme = git_sha("# " + payload["name"])
+            repo["blobs"][readme] = "# " + payload["name"]
+            repo["refs"]["main"] = self._commit(repo, self._tree(repo, {"README.md": readme}), [], "Initial commit")
+        return 201, {"name": payload["name"], "owner": {"login": self.owner}, "default_branch": "main"}
+
+    def get_repo(self, req, handler):
+        repo = self._repo(req)
+        if repo is None:
+            return 404, {"message": "Not Found"}
+        return 200, {"name": req["args"][1], "owner": {"login": req["args"][0]},
+                     "default_branch": repo["default_branch"]}
+
+    def get_contents(self, req, handler):
+        repo = self._repo(req)
+        ref = req["query"].get("ref", [None])[0] if repo else None
+        head = repo and repo["refs"].get(ref or repo["default_branch"])
+        blob = head and repo["trees"][repo["commits"][head]["tree"]].get(req["args"][2])
+        if not blob:
+            return 404, {"message": "Not Found"}
+        return 200, {"sha": blob, "path": req["args"][2]}
+
+    def put_contents(self, req, handler):
+        repo = self._repo(req)
+        if repo is None:
+            return 404, {"message": "Not Found"}
+        payload = self.json(req)
+        branch = payload.get("branch", repo["default_branch"])
+        head = repo["refs"].get(branch)
+        files = dict(repo["trees"][repo["commits"][head]["tree"]]) if head else {}
+        path = req["args"][2]
+        if path in files and payload.get("sha") != files[path]:
+            return 422, {"message": "sha wasn't supplied"}
+        files[path] = git_sha(payload["content"])
+        repo["blobs"][files[path]] = payload["content"]
+        repo["refs"][branch] = self._commit(repo, self._tree(repo, files), [head] if head else [], payload["message"])
+        return 200, {"content": {"sha": files[path]}, "commit": {"sha": repo["refs"][branch]}}
+
+    def get_commit(self, req, handler):
+        repo = self._repo(req)
+        sha = repo and (repo["refs"].get(req["args"][2]) or req["args"][2])
+        if not repo or sha not in repo["commits"]:
+            return 404, {"message": "Not Found"}
+        return 200, {"sha": sha, "commit": {"tree": {"sha": repo["commits"][sha]["tree"]}}}
+
+    def create_blob(self, req, handler):
+        repo = self._repo(req)
+        content = self.json(req)["content"]
+        sha = git_sha(content)
+        repo["blobs"][sha] = content
+        return 201, {"sha": sha}
+
+    def get_tree(self, req, handler):
+        repo = self._repo(req)
+        files = repo and repo["trees"].get(req["args"][2])
+        if files is None:
+            return 404, {"message": "Not Found"}
+        return 200, {"sha": req["args"][2], "truncated": False,
+                     "tree": [{"path": p, "mode": "100644", "type": "blob", "sha": s} for p, s in files.items()]}
+
+    def create_tree(self, req, handler):
+        repo = self._repo(req)
+        payload = self.json(req)
+        files = dict(repo["trees"].get(payload.get("base_tree"), {}))
+        for entry in payload["tree"]:
+            if "content" in entry:
+                entry["sha"] = git_sha(entry["content"])
+                repo["blobs"][entry["sha"]] = entry["content"]
+            if entry["sha"] is None:  # deletes the path
+                files.pop(entry["path"], None)
+            else:
+                files[entry["path"]] = entry["sha"]
+        return 201, {"sha": self._tree(repo, files)}
+
+    def create_commit(self, req, handler):
+        repo = self._repo(req)
+        payload = self.json(req)
+        return 201, {"sha": self._commit(repo, payload["tree"], payload["parents"], payload["message"])}
+
+    def update_ref(self, req, handler):
+        repo = self._repo(req)
+        new = self.json(req)["sha"]
+        branch = req["args"][2]
+        if repo["refs"].get(branch) not in repo["commits"][new]["parents"]:
+            return 422, {"message": "Update is not a fast forward"}
+        repo["refs"][branch] = new
+        return 200, {"ref": f"refs/heads/{branch}", "object": {"sha": new}}
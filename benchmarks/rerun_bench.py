@@ -0,0 +1,140 @@
+"""
+Cost of one Streamlit rerun of streamlit_app.py: script time and bytes
+sent to the browser, for a full rerun and for each fragment on its own.
+
+    python benchmarks/rerun_bench.py
+    python benchmarks/rerun_bench.py --turns 30 --preview-kb 200
+
+The session is filled with --turns chat turns and a --preview-kb app, so
+the numbers reflect a session that has been in use for a while. A fragment
+rerun is what a click inside that fragment costs (Streamlit reruns only the
+fragment); AppTest itself always reruns the whole script, so fragments are
+rerun here through Streamlit's fragment queue directly.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import streamlit.testing.v1.app_test as app_test_module  # noqa: E402
+from streamlit.runtime.fragment import MemoryFragmentStorage  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.element_tree import parse_tree_from_messages  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner, require_widgets_deltas  # noqa: E402
+
+CACHE_DIR = tempfile.mkdtemp(prefix="volt-bench-")  # the app's VOLT_CACHE_DIR, not the real .volt/
+
+
+class ProbeRunner(LocalScriptRunner):
+    """
+    LocalScriptRunner that keeps fragments and the compiled script across
+    runs, as a Streamlit server does (AppTest creates a new runner per run),
+    and can run a single fragment instead of the script.
+    """
+    storage = MemoryFragmentStorage()
+    script_cache = ScriptCache()
+    fragment_id = None
+    last = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fragment_storage = ProbeRunner.storage
+        self._script_cache = ProbeRunner.script_cache
+        ProbeRunner.last = self
+
+    def run(self, widget_state=None, query_params=None, timeout=3, page_hash=""):
+        if ProbeRunner.fragment_id is None:
+            return super().run(widget_state, query_params, timeout, page_hash)
+        self.request_rerun(RerunData(fragment_id_queue=[ProbeRunner.fragment_id], is_fragment_scoped_rerun=True))
+        self.start()
+        require_widgets_deltas(self, timeout)
+        return parse_tree_from_messages(self.forward_msgs())
+
+    def sent_bytes(self):
+        return sum(msg.ByteSize() for msg in self.forward_msgs())
+
+
+def fragments():
+    """
+    {function name: fragment id} of the fragments registered by the last full run.
+    """
+    names = {}
+    for fragment_id, wrapped in ProbeRunner.storage._fragments.items():
+        cells = dict(zip(wrapped.__code__.co_freevars, wrapped.__closure__ or ()))
+        func = cells["non_optional_func"].cell_contents
+        names[func.__name__] = fragment_id
+    return names
+
+
+def session(turns, preview_kb):
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=60)
+    at.secrets["OPENAI_API_KEY"] = "bench"
+    at.secrets["NETLIFY_PAT"] = "bench"
+    at.secrets["NETLIFY_TEAM_SLUG"] = "bench"
+    at.secrets["NETLIFY_OAUTH_CLIENT_ID"] = "bench"
+    at.secrets["NETLIFY_OAUTH_CLIENT_SECRET"] = "bench"
+    at.secrets["auth"] = {"domain": "auth.invalid", "client_id": "bench", "client_secret": "bench"}
+    at.secrets["VOLT_CACHE_DIR"] = CACHE_DIR
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    section = "<section><h2>Part</h2><p>" + "lorem ipsum " * 40 + "</p></section>"
+    html = "<html><body>" + section * (preview_kb * 1024 // len(section)) + "</body></html>"
+    live = at.session_state.live  # signed out: the app's live() state is in st.session_state
+    for i in range(turns):
+        live.chat_history.append({"role": "user", "content": f"change number {i}"})
+        live.chat_history.append(
+            {"role": "assistant", "content": f"Here it is:\n```html\n{html[:20000]}\n```"})
+    live.html = html
+    at.session_state.html_version = 1
+    at.session_state.session_id = "bench"
+    return at
+
+
+def measure(at, fragment_id, repeat):
+    ProbeRunner.fragment_id = fragment_id
+    times, sizes = [], []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        at._run()
+        times.append(time.perf_counter() - t)
+        sizes.append(ProbeRunner.last.sent_bytes())
+    ProbeRunner.fragment_id = None
+    return statistics.median(times), statistics.median(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-rerun cost of streamlit_app.py.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=15, help="chat turns in the session")
+    parser.add_argument("--preview-kb", type=int, default=100, help="size of the previewed app")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # the app reads its prompt files relative to the working directory
+    app_test_module.LocalScriptRunner = ProbeRunner
+    try:
+        at = session(args.turns, args.preview_kb)
+        rows = [("full rerun", *measure(at, None, args.repeat))]
+        for name, fragment_id in sorted(fragments().items()):
+            rows.append((f"fragment {name}", *measure(at, fragment_id, args.repeat)))
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    print(f"{args.turns} chat turns, {args.preview_kb} KB preview, median of {args.repeat}")
+    print(f"{'rerun':<32}{'time':>10}{'sent':>12}")
+    for name, seconds, size in rows:
+        print(f"{name:<32}{seconds * 1000:>8.1f}ms{size / 1024:>10.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
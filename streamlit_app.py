@@ -1,5 +1,23 @@
 import streamlit as st
-import openai, re, io, time, uuid, zipfile, jwt, requests, coolname, base64
+import openai, asyncio, io, os, time, uuid, zipfile, threading, requests, base64, sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from volt.extract import extract_html_from_markdown, StreamingHTMLExtractor
+from volt.stream import Coalescer
+from volt.router import DEFAULT_POLICY, features, hedge_backups, record_decision, route
+from volt.patch import parse_edits, apply_edits, PatchError
+from volt.history import compact_history, message_tokens
+from volt.versions import DirectoryObjectStore, VersionStore
+from volt.sessions import LiveSessions, SessionWriter, SQLiteSessionStore
+from volt.build import build_site, is_build_output
+from volt.httpclient import make_session
+from volt.netlify import Netlify, SiteNotFound, site_files_from_html_str
+from volt.admission import Admission
+from volt.response_cache import ResponseCache, cache_key, replay_events
+from volt.generate import DEFAULT_MODEL, hedged_events, new_timing, record_stream_spans, stream_events
+from volt import tracing
+from volt.tracing import span
 
 st.set_page_config(page_title="volt", page_icon="⚡",
                    menu_items={
@@ -8,165 +26,472 @@ st.set_page_config(page_title="volt", page_icon="⚡",
                         'About': "Create and deploy HTML apps with AI. Made with ❤️ by vibecoders.studio⚡"
                     }
                 )
+
+def secret_flag(name, default=False) -> bool:
+    """
+    Boolean secret, given as a TOML bool or a string like "true"/"false".
+    """
+    value = st.secrets.get(name, default)
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
 openai.api_key=st.secrets['OPENAI_API_KEY']
+openai.max_retries = 0  # volt.generate.stream_events retries 429s itself, pausing llm_admission()
+if "OPENAI_BASE_URL" in st.secrets:  # e.g. the local stand-in used by benchmarks/
+    openai.base_url = st.secrets["OPENAI_BASE_URL"]
 pat = st.secrets['NETLIFY_PAT']
 team_slug = st.secrets['NETLIFY_TEAM_SLUG']
-API_BASE = "https://api.netlify.com/api/v1"
+API_BASE = st.secrets.get("NETLIFY_API_BASE", "https://api.netlify.com/api/v1")
+NETLIFY_POLL_S = float(st.secrets.get("NETLIFY_POLL_INTERVAL_S", 1))  # first wait while a deploy processes
+GITHUB_API = st.secrets.get("GITHUB_API_BASE", "https://api.github.com")
 avatar = {'user': '⚡', 'assistant': '🤖', 'system': '🔧'}
-model = 'gpt-5-nano'
+model = DEFAULT_MODEL
 AUTH0_DOMAIN = st.secrets["auth"]["domain"]
+CACHE_DIR = st.secrets.get("VOLT_CACHE_DIR", ".volt")  # on-disk caches, spans and sessions
+DEPLOY_MANIFESTS = os.path.join(CACHE_DIR, "deploy_manifests.json")
+DEPLOY_SITES = os.path.join(CACHE_DIR, "deploy_sites.json")
+VERSIONS_DIR = os.path.join(CACHE_DIR, "versions")  # without a SESSION_DB
+# Signed-in users' sessions are saved here (volt.sessions); "" keeps sessions in memory only
+SESSION_DB = st.secrets.get("SESSION_DB", os.path.join(CACHE_DIR, "sessions.sqlite3"))
+SESSION_IDLE_S = float(st.secrets.get("SESSION_IDLE_S", 900))  # then dropped from memory until the next run
+HTTP_TIMEOUT = (float(st.secrets.get("HTTP_CONNECT_TIMEOUT", 5)), float(st.secrets.get("HTTP_READ_TIMEOUT", 60)))
+HTTP_POOL_SIZE = int(st.secrets.get("HTTP_POOL_SIZE", 16))
+CONTEXT_BUDGET_TOKENS = int(st.secrets.get("CONTEXT_BUDGET_TOKENS", 60000))
+VERSION_MEMORY_BYTES = int(st.secrets.get("VERSION_MEMORY_BYTES", 1 << 20))
+STREAM_FLUSH_S = float(st.secrets.get("STREAM_FLUSH_MS", 50)) / 1000  # UI updates while streaming
+# Hedged generation (volt.generate.hedged_events): "off", "hedge" (start the next
+# candidate when none has produced output after HEDGE_AFTER_S) or "race" (all at once,
+# the losers become selectable variants). Candidates are "model:effort" strings.
+# Off by default: cancelled candidates are still billed.
+HEDGE_MODE = st.secrets.get("HEDGE_MODE", "off")
+HEDGE_AFTER_S = float(st.secrets.get("HEDGE_AFTER_S", 15))
+HEDGE_CANDIDATES = [dict(zip(("model", "effort"), c.split(":", 1)))
+                    for c in st.secrets.get("HEDGE_CANDIDATES", [f"{model}:medium", f"{model}:low"])]
+# Model/effort per turn (volt.router); [[ROUTER_POLICY]] tables in secrets replace the default
+ROUTER_POLICY = [{**r, "when": dict(r.get("when", {}))} for r in st.secrets.get("ROUTER_POLICY", [])] or DEFAULT_POLICY
+# Process-wide limits on model requests (volt.admission); 0 tokens per minute: no token limit
+LLM_MAX_INFLIGHT = int(st.secrets.get("LLM_MAX_INFLIGHT", 8))
+LLM_TOKENS_PER_MINUTE = int(st.secrets.get("LLM_TOKENS_PER_MINUTE", 0))
+# Reuse responses to identical model input (volt.response_cache), off unless enabled
+RESPONSE_CACHE = secret_flag("RESPONSE_CACHE")
+RESPONSE_CACHE_ENTRIES = int(st.secrets.get("RESPONSE_CACHE_ENTRIES", 256))  # kept in memory
+RESPONSE_CACHE_DISK_MB = float(st.secrets.get("RESPONSE_CACHE_DISK_MB", 200))
+RESPONSE_CACHE_TTL_S = float(st.secrets.get("RESPONSE_CACHE_TTL_S", 7 * 86400))
+SPANS_PATH = os.path.join(CACHE_DIR, "spans.jsonl")
+ADMIN_TOKEN = st.secrets.get("ADMIN_TOKEN")
+tracing.configure(SPANS_PATH)
+
+@st.cache_resource(show_spinner=False)
+def read_text(path) -> str:
+    """
+    Static files (prompts, default page), read once per process.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
 
 # Import system prompt from file
-with open('system_prompt.md', 'r', encoding='utf-8') as f:
-    system_prompt = f.read()
+system_prompt = read_text('system_prompt.md')
+edit_prompt = read_text('edit_prompt.md')
+
+PATCH_FALLBACK = ("Your edit blocks could not be applied ({error}). "
+                  "Output the complete updated HTML code inside of markdown ```html container.")
 
 # Function to load default HTML content
 def load_default_html() -> str:
     try:
-        with open('default_index.html', 'r', encoding='utf-8') as f:
-            return f.read()
+        return read_text('default_index.html')
     except FileNotFoundError:
         # tiny safe fallback if file is missing
         return """<!doctype html><html><head><meta charset=\"utf-8\"><title>Welcome</title></head>\n<body><h1>Here Be Dragons 🐉</h1><p>Ask me to generate some HTML!</p></body></html>"""
 
+@st.cache_resource(show_spinner=False)
+def session_store() -> SQLiteSessionStore:
+    return SQLiteSessionStore(SESSION_DB)
+
+@st.cache_resource(show_spinner=False)
+def version_objects():
+    """
+    Object store of the app versions: the session database, so that any
+    replica restoring a session finds its versions too.
+    """
+    return session_store() if SESSION_DB else DirectoryObjectStore(VERSIONS_DIR)
+
+def new_versions() -> VersionStore:
+    return VersionStore(version_objects(), max_memory_bytes=VERSION_MEMORY_BYTES)
+
 # Initialize session state variables
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = [{"role": "system", "content": system_prompt}]
 if "html_version" not in st.session_state:
     st.session_state.html_version = 0
 if "app_name" not in st.session_state:
+    import coolname  # once per session, not on every rerun
     st.session_state.app_name = '-'.join(coolname.generate())
 if "app_name_editing" not in st.session_state:
     st.session_state.app_name_editing = False
 if "app_name_input" not in st.session_state:
     st.session_state.app_name_input = st.session_state.app_name
-if "html" not in st.session_state:
-    st.session_state.html = load_default_html()
 if "github" not in st.session_state:
     st.session_state.github = None
-if "is_deploying" not in st.session_state:
-    st.session_state.is_deploying = False
+if "deploy_job" not in st.session_state:
+    st.session_state.deploy_job = None
+if "optimize_assets" not in st.session_state:
+    st.session_state.optimize_assets = False  # opt-in: volt.build rewrites the deployed files
+if "edit_mode" not in st.session_state:
+    st.session_state.edit_mode = True
 if "flash" not in st.session_state:
     st.session_state.flash = []
+if "user_key" not in st.session_state:
+    st.session_state.user_key = uuid.uuid4().hex  # admission queue of signed-out sessions
 
 def flash(msg: str, kind: str = "success", balloons: bool = False):
     st.session_state.flash.append({"msg": msg, "kind": kind, "balloons": balloons})
 
 
+def show_version(h: str):
+    """
+    Make stored version h the one shown in the preview and deployed by default.
+    """
+    state = live()
+    state.html = state.versions.get(h)
+    st.session_state.html_version = state.versions.cursor + 1
+
+
 def commit_app_name():
     name = st.session_state.app_name_input.strip()
     if name:
+        # Whatever was cached about either name's site is checked again on the next deploy
+        netlify().sites.forget(st.session_state.app_name, name)
+        owner = session_owner()
+        if owner is not None:
+            live()  # loaded under the old name if it was dropped
+            live_sessions().rename((owner, st.session_state.app_name), (owner, name))
         st.session_state.app_name = name
     st.session_state.app_name_editing = False
 
-def zip_from_html_str(html_str: str) -> bytes:
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr("index.html", html_str)  # in-memory file
-    buf.seek(0)
-    return buf.read()
+# Saved with the session besides the chat history and version timeline
+PERSISTED_FIELDS = ("site_id", "site_url", "session_id", "github", "edit_mode", "optimize_assets")
+
+@st.cache_resource(show_spinner=False)
+def live_sessions() -> LiveSessions:
+    return LiveSessions(SESSION_IDLE_S)
+
+def session_owner():
+    """
+    Key of the signed-in user, None if this session isn't saved.
+    """
+    return st.user.get("sub") if SESSION_DB and st.user.get("is_logged_in") else None
+
+def new_live_state() -> SimpleNamespace:
+    return SimpleNamespace(chat_history=[{"role": "system", "content": system_prompt}], versions=new_versions(),
+                           html=load_default_html(), variants=None, writer=None)
+
+def live() -> SimpleNamespace:
+    """
+    The large state of this session: chat_history, versions, html, variants
+    and the SessionWriter saving them. A signed-in user's is kept in
+    live_sessions() under (owner, app) and loaded from the store on the
+    session's first run and whenever it was dropped for being idle. A
+    signed-out session has nothing to reload it from: it keeps it in
+    st.session_state.
+    """
+    owner = session_owner()
+    if owner is None:
+        if "live" not in st.session_state:
+            st.session_state.live = new_live_state()
+        return st.session_state.live
+    if st.session_state.get("session_owner") == owner:
+        state = live_sessions().get((owner, st.session_state.app_name))
+        if state is not None:
+            return state
+    with span("session.load"):
+        return load_session(owner)
+
+def load_session(owner) -> SimpleNamespace:
+    """
+    Saved state of the owner's app: on a session's first run the app they
+    worked on last (its persisted fields go into st.session_state), after
+    an eviction the app this session was on.
+    """
+    reload = st.session_state.get("session_owner") == owner
+    saved = session_store().load(owner, st.session_state.app_name if reload else None)
+    fields = saved["fields"] if saved else {}
+    if saved and not reload:
+        st.session_state.app_name = st.session_state.app_name_input = saved["app"]
+        for key in PERSISTED_FIELDS:
+            if fields.get(key) is not None:
+                st.session_state[key] = fields[key]
+    key = (owner, st.session_state.app_name)
+    state = None if reload else live_sessions().get(key)  # e.g. already loaded by another tab
+    if state is None:
+        state = new_live_state()
+        if saved:
+            state.chat_history = saved["messages"]
+        if "versions" in fields:
+            state.versions = VersionStore.restore(version_objects(), fields["versions"],
+                                                  max_memory_bytes=VERSION_MEMORY_BYTES)
+            if state.versions.timeline:
+                state.html = state.versions.get(state.versions.current)
+        state.writer = SessionWriter(session_store(), owner, st.session_state.app_name, saved)
+        live_sessions().put(key, state)
+    st.session_state.html_version = state.versions.cursor + 1
+    st.session_state.session_owner = owner
+    return state
+
+def save_session():
+    """
+    Write what this run changed (see volt.sessions.SessionWriter).
+    """
+    if session_owner() is None:
+        return
+    state = live()
+    fields = {"versions": state.versions.state(),
+              **{key: st.session_state[key] for key in PERSISTED_FIELDS if key in st.session_state}}
+    try:
+        state.versions.persist()
+        with span("session.save") as attrs:
+            attrs["written"] = state.writer.save(st.session_state.app_name, fields, state.chat_history)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error saving session: {e}")
+
+@st.cache_resource(show_spinner=False)
+def http() -> requests.Session:
+    """
+    Process-wide HTTP client for Netlify, GitHub and Auth0 calls.
+    One Session reuses TCP+TLS connections (one pool per host) across all
+    sessions and deploy workers.
+    """
+    return make_session(HTTP_TIMEOUT, HTTP_POOL_SIZE)
+
+@st.cache_resource(show_spinner=False)
+def netlify() -> Netlify:
+    """
+    Netlify API client shared by all sessions and deploy workers. Its site
+    cache is filled in the background from one listing of the team's sites.
+    """
+    client = Netlify(pat, http(), API_BASE, manifests_path=DEPLOY_MANIFESTS, sites_path=DEPLOY_SITES,
+                     poll_interval_s=NETLIFY_POLL_S)
+
+    def warm():
+        try:
+            print(f"Cached {client.warm_site_cache(team_slug)} Netlify sites")
+        except Exception as e:
+            print(f"Error listing Netlify sites: {e}")
+
+    threading.Thread(target=warm, name="volt-site-warm", daemon=True).start()
+    return client
+
+@st.cache_resource(show_spinner=False)
+def llm_admission() -> Admission:
+    """
+    Gate shared by every model request of every session, queueing them
+    fairly per user once LLM_MAX_INFLIGHT or LLM_TOKENS_PER_MINUTE is reached.
+    """
+    return Admission(LLM_MAX_INFLIGHT, LLM_TOKENS_PER_MINUTE)
+
+@st.cache_resource(show_spinner=False)
+def response_cache() -> ResponseCache:
+    return ResponseCache(os.path.join(CACHE_DIR, "responses"), RESPONSE_CACHE_ENTRIES,
+                         int(RESPONSE_CACHE_DISK_MB * (1 << 20)), RESPONSE_CACHE_TTL_S)
+
+live()  # a signed-in user's saved app is loaded before anything is drawn
+netlify()  # created on the first run of the process, so the site listing starts right away
+
+class TTLCache:
+    """
+    Thread-safe LRU of values that expire.
+    get_or_fetch() treats an entry as stale `refresh_margin_s` before it
+    expires, and runs at most one fetch per key at a time (single-flight):
+    concurrent callers that miss wait for that fetch instead of starting their own.
+    """
+    def __init__(self, maxsize=1024, refresh_margin_s=60):
+        self.maxsize = maxsize
+        self.refresh_margin_s = refresh_margin_s
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (value, expires_at)
+        self.inflight = {}            # key -> threading.Event
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return the cached value for key, or call fetch() -> (value, ttl_s).
+        """
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry and time.time() < entry[1] - self.refresh_margin_s:
+                    self.entries.move_to_end(key)
+                    return entry[0]
+                done = self.inflight.get(key)
+                if done is None:
+                    done = self.inflight[key] = threading.Event()
+                    break
+            done.wait()
+        try:
+            value, ttl_s = fetch()
+            self.set(key, value, ttl_s)
+            return value
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            done.set()
+
+    def set(self, key, value, ttl_s):
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl_s)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+@st.cache_resource(show_spinner=False)
+def credential_cache() -> TTLCache:
+    """
+    Auth0 management token and per-user GitHub tokens, shared by all sessions.
+    """
+    return TTLCache(maxsize=int(st.secrets.get("GITHUB_TOKEN_CACHE_SIZE", 1024)))
+
+GITHUB_TOKEN_TTL_S = 15 * 60  # GitHub tokens don't expire; recheck identities now and then
+
+def get_auth0_mgmt_token() -> str:
+    def fetch():
+        r = http().post(f"https://{AUTH0_DOMAIN}/oauth/token", json={
+        "client_id": st.secrets["auth"]["client_id"],
+        "client_secret": st.secrets["auth"]["client_secret"],
+        "audience": f"https://{AUTH0_DOMAIN}/api/v2/",
+        "grant_type": "client_credentials",
+        })
+        r.raise_for_status()
+        data = r.json()
+        return data["access_token"], data.get("expires_in", 86400)
+    return credential_cache().get_or_fetch("auth0:mgmt", fetch)
 
 def get_github_token(auth0_user_id: str) -> str | None:
-    mgmt = requests.post(f"https://{AUTH0_DOMAIN}/oauth/token", json={
-    "client_id": st.secrets["auth"]["client_id"],
-    "client_secret": st.secrets["auth"]["client_secret"],
-    "audience": f"https://{AUTH0_DOMAIN}/api/v2/",
-    "grant_type": "client_credentials",
-    }).json()["access_token"]
-    r = requests.get(
-        f"https://{AUTH0_DOMAIN}/api/v2/users/{auth0_user_id}",
-        headers={"Authorization": f"Bearer {mgmt}"},
-        params={"fields": "identities", "include_fields": "true"},
-    )
-    r.raise_for_status()
-    for ident in r.json().get("identities", []):
-        if ident.get("provider") == "github":
-            return ident.get("access_token")
-    return None
+    def fetch():
+        r = None
+        for _ in range(2):
+            r = http().get(
+                f"https://{AUTH0_DOMAIN}/api/v2/users/{auth0_user_id}",
+                headers={"Authorization": f"Bearer {get_auth0_mgmt_token()}"},
+                params={"fields": "identities", "include_fields": "true"},
+            )
+            if r.status_code != 401:
+                break
+            # Management token revoked or rotated: drop it and retry once
+            credential_cache().invalidate("auth0:mgmt")
+        r.raise_for_status()
+        for ident in r.json().get("identities", []):
+            if ident.get("provider") == "github":
+                return ident.get("access_token"), GITHUB_TOKEN_TTL_S
+        return None, GITHUB_TOKEN_TTL_S
+    return credential_cache().get_or_fetch(f"github:{auth0_user_id}", fetch)
 
 
 def create_new_repo(token, repo_name):
-    headers = {
-    "Authorization": f"Bearer {token}",
-    "Accept": "application/vnd.github+json",
-    "X-GitHub-Api-Version": "2022-11-28"
-    }
-    r = requests.post("https://api.github.com/user/repos",
+    headers = github_headers(token)
+    r = http().post(f"{GITHUB_API}/user/repos",
                     json={"name":repo_name,"private":True,"auto_init":True},
                     headers=headers)
     repo = r.json()
     owner, name = repo["owner"]["login"], repo["name"]
     return owner, name
 
-def push_to_github(token, owner, name, message="Commit from Volt ⚡", version=st.session_state.html_version):
-    headers = {
+@st.cache_resource(show_spinner=False)
+def github_repo_cache() -> TTLCache:
+    """
+    Default branch, head commit and tree of the repos we push to.
+    """
+    return TTLCache(maxsize=512, refresh_margin_s=0)
+
+GITHUB_REPO_TTL_S = 60 * 60
+
+def github_headers(token):
+    return {
         "Authorization": f"Bearer {token}",
         "Accept": "application/vnd.github+json",
         "X-GitHub-Api-Version": "2022-11-28",
     }
 
-    # 1) Find default branch
-    r = requests.get(f"https://api.github.com/repos/{owner}/{name}", headers=headers)
-    r.raise_for_status()
-    branch = r.json().get("default_branch", "main")
-
-    # 2) Read & encode content from in-memory HTML
-    html_bytes = st.session_state.html.encode("utf-8")
-    content = base64.b64encode(html_bytes).decode("utf-8")
-
-    url = f"https://api.github.com/repos/{owner}/{name}/contents/index.html"
-
-    # 3) See if the file already exists (to get its sha)
-    stat = requests.get(url, headers=headers, params={"ref": branch})
-
-    payload = {"message": message + f" version {version}", "content": content, "branch": branch}
-    if stat.status_code == 200:
-        payload["sha"] = stat.json()["sha"]  # required to update
-    elif stat.status_code == 404:
-        pass  # creating new file on this branch
-    else:
-        # Helpful when debugging 422 and others
-        raise requests.HTTPError(f"Stat failed: {stat.status_code} {stat.text}")
-
-    put = requests.put(url, json=payload, headers=headers)
-    try:
-        put.raise_for_status()
-    except requests.HTTPError:
-        # Print server's error details (e.g. "No commit found for the ref", "sha wasn't supplied")
-        print(put.text)
-        raise
-
-def http_headers(pat, extra=None):
-    h = {
-        "Authorization": f"Bearer {pat}",
-        "User-Agent": "netlify-e2e-script (oss)",
-    }
-    if extra:
-        h.update(extra)
-    return h
-
-def get_site_by_domain(domain: str):
+def get_repo_head(token, owner, name, create=False) -> dict:
     """
-    Look up a Netlify site by its domain. Returns site JSON if found, else None.
+    {"branch", "head", "tree", "paths"} of a repo's default branch (paths:
+    the files in its tree), cached per repo. A cold lookup is GET repo +
+    GET commit + GET tree; the repo is only created (create_new_repo) when
+    that GET says it doesn't exist and create=True.
     """
-    r = requests.get(f"{API_BASE}/sites/{domain}", headers=http_headers(pat))
-    if r.status_code == 200:
-        return r.json()
-    return None
+    def fetch():
+        headers = github_headers(token)
+        r = http().get(f"{GITHUB_API}/repos/{owner}/{name}", headers=headers)
+        if r.status_code == 404 and create:
+            create_new_repo(token, name)
+            r = http().get(f"{GITHUB_API}/repos/{owner}/{name}", headers=headers)
+        r.raise_for_status()
+        branch = r.json().get("default_branch", "main")
+        c = http().get(f"{GITHUB_API}/repos/{owner}/{name}/commits/{branch}", headers=headers)
+        c.raise_for_status()
+        head = c.json()
+        tree = head["commit"]["tree"]["sha"]
+        t = http().get(f"{GITHUB_API}/repos/{owner}/{name}/git/trees/{tree}", headers=headers,
+                       params={"recursive": "1"})
+        t.raise_for_status()
+        paths = [e["path"] for e in t.json().get("tree", []) if e.get("type") == "blob"]
+        return {"branch": branch, "head": head["sha"], "tree": tree, "paths": paths}, GITHUB_REPO_TTL_S
+    return github_repo_cache().get_or_fetch(f"{owner}/{name}", fetch)
 
+def push_files_to_github(token, owner, name, files: dict, message="Commit from Volt ⚡", create=True):
+    """
+    Push files ({path: bytes}, e.g. from build_site) as a single commit with
+    the Git Data API: POST trees -> POST commits -> PATCH refs.
+    With the repo head cached (get_repo_head) that's 3 requests per push.
+    Build outputs of earlier pushes that files no longer has (old assets,
+    _headers once optimizing is off) are deleted in the same commit.
+    Returns the commit JSON, or None when nothing changed.
+    """
+    with span("github.push", files=len(files)):
+        return _push_files(token, owner, name, files, message, create)
 
-# Separate get and create site logic
-def create_site(team_slug: str, name: str, tool="volt⚡", session_id=None):
-    payload = {"account_slug": team_slug, "name": name, "created_via": tool}
-    if session_id:
-        payload["session_id"] = session_id
-    r = requests.post(f"{API_BASE}/sites", json=payload,
-                      headers=http_headers(pat, {"Content-Type": "application/json"}))
-    if r.status_code >= 300:
-        raise RuntimeError(f"Create site failed: {r.status_code} {r.text}")
+def _push_files(token, owner, name, files, message, create):
+    headers = github_headers(token)
+    git = f"{GITHUB_API}/repos/{owner}/{name}/git"
+    tree = []
+    for path, content in files.items():
+        entry = {"path": path.lstrip("/"), "mode": "100644", "type": "blob"}
+        try:
+            entry["content"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            b = http().post(f"{git}/blobs", headers=headers, json={
+                "content": base64.b64encode(content).decode("ascii"), "encoding": "base64"})
+            b.raise_for_status()
+            entry["sha"] = b.json()["sha"]
+        tree.append(entry)
 
-    r.raise_for_status()
-    return r.json()
+    key = f"{owner}/{name}"
+    pushed = {entry["path"] for entry in tree}
+    for attempt in range(2):
+        repo = get_repo_head(token, owner, name, create=create)
+        stale = [p for p in repo["paths"] if p not in pushed and is_build_output(p)]
+        deletions = [{"path": p, "mode": "100644", "type": "blob", "sha": None} for p in stale]
+        t = http().post(f"{git}/trees", json={"base_tree": repo["tree"], "tree": tree + deletions},
+                        headers=headers)
+        t.raise_for_status()
+        tree_sha = t.json()["sha"]
+        if tree_sha == repo["tree"]:
+            return None
+        c = http().post(f"{git}/commits", headers=headers,
+                        json={"message": message, "tree": tree_sha, "parents": [repo["head"]]})
+        c.raise_for_status()
+        commit = c.json()
+        ref = http().patch(f"{git}/refs/heads/{repo['branch']}", json={"sha": commit["sha"]}, headers=headers)
+        if ref.status_code == 422 and attempt == 0:
+            # Not a fast-forward: the branch moved since we cached its head
+            github_repo_cache().invalidate(key)
+            continue
+        ref.raise_for_status()
+        paths = sorted(set(repo["paths"]).difference(stale) | pushed)
+        github_repo_cache().set(key, {**repo, "head": commit["sha"], "tree": tree_sha, "paths": paths},
+                                GITHUB_REPO_TTL_S)
+        return commit
 
 def zip_webpage() -> bytes:
     """
@@ -178,62 +503,145 @@ def zip_webpage() -> bytes:
     buf.seek(0)
     return buf.read()
 
-def deploy_zip_zipmethod(pat, site_id, zip_bytes):
+class DeployError(RuntimeError):
     """
-    ZIP file deploy (official, simple): POST /sites/{site_id}/deploys
-    Content-Type: application/zip, body=zip
-    Returns deploy JSON with id, state, etc.
+    A failed deploy; `result` keeps what did succeed (e.g. the GitHub push).
     """
-    r = requests.post(
-        f"{API_BASE}/sites/{site_id}/deploys",
-        headers=http_headers(pat, {"Content-Type": "application/zip"}),
-        data=zip_bytes,
-        timeout=120,
-    )
-    if r.status_code >= 300:
-        raise RuntimeError(f"ZIP deploy failed: {r.status_code} {r.text}")
-    return r.json()
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
 
-def deploy_zip_buildapi(pat, site_id, zip_bytes, title="Initial deploy"):
+class DeployJobs:
     """
-    Build API (multipart form): POST /sites/{site_id}/builds with fields:
-      - title
-      - zip (application/zip)
+    Process-wide deploy executor shared by every Streamlit session.
+    Each job is a dict in `jobs` (state: queued/uploading/building/ready/failed);
+    sessions only keep the job id and read snapshots with get(). A failed
+    job's result is the DeployError's partial result, if any.
     """
-    files = {
-        "zip": ("site.zip", io.BytesIO(zip_bytes), "application/zip"),
-    }
-    data = {"title": title}
-    r = requests.post(
-        f"{API_BASE}/sites/{site_id}/builds",
-        headers=http_headers(pat),
-        files=files,
-        data=data,
-        timeout=120,
-    )
-    if r.status_code >= 300:
-        raise RuntimeError(f"Build API deploy failed: {r.status_code} {r.text}")
-    return r.json()
-
-def poll_deploy_ready(pat, deploy_id, timeout_s=120, interval_s=3):
-    """
-    Poll /deploys/{deploy_id} until state == 'ready' or timeout.
-    """
-    deadline = time.time() + timeout_s
-    last_state = None
-    while time.time() < deadline:
-        r = requests.get(f"{API_BASE}/deploys/{deploy_id}",
-                         headers=http_headers(pat))
-        if r.status_code >= 300:
-            raise RuntimeError(f"Poll deploy failed: {r.status_code} {r.text}")
-        state = r.json().get("state")
-        if state != last_state:
-            print(f"- Deploy state: {state}")
-            last_state = state
-        if state == "ready":
-            return r.json()
-        time.sleep(interval_s)
-    raise TimeoutError("Timed out waiting for deploy to be ready")
+    def __init__(self, max_workers=8, keep_finished_s=600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="volt-deploy")
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.keep_finished_s = keep_finished_s
+
+    def submit(self, fn, **kwargs) -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self._prune()
+            self.jobs[job_id] = {"id": job_id, "state": "queued", "created": time.time(),
+                                 "finished": None, "result": None, "error": None}
+        self.executor.submit(self._run, job_id, fn, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _run(self, job_id, fn, kwargs):
+        try:
+            result = fn(lambda state: self.update(job_id, state=state), **kwargs)
+            self.update(job_id, state="ready", result=result, finished=time.time())
+        except Exception as e:
+            self.update(job_id, state="failed", error=str(e) or type(e).__name__,
+                        result=getattr(e, "result", None), finished=time.time())
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished_s
+        for job_id in [j for j, job in self.jobs.items() if job["finished"] and job["finished"] < cutoff]:
+            del self.jobs[job_id]
+
+@st.cache_resource(show_spinner=False)
+def deploy_jobs() -> DeployJobs:
+    return DeployJobs()
+
+DEPLOY_TIMEOUT_S = 300
+
+def package_site(html_str, optimize):
+    with span("deploy.package", optimize=optimize):
+        return build_site(html_str) if optimize else site_files_from_html_str(html_str)
+
+async def deploy_pipeline(set_state, app_name, html_str, version, optimize=False, github=None):
+    """
+    Deploy to Netlify and, when github=(token, owner, repo) is given, push
+    to GitHub, overlapping whatever doesn't depend on each other:
+
+        package ──┬── Netlify upload + poll ──┐
+        site ─────┘                           ├── result
+        package ───── GitHub push ────────────┘
+
+    A failing target doesn't stop the other; all failures are reported
+    together. On timeout (DEPLOY_TIMEOUT_S) or cancellation, pending stages
+    are cancelled and the deploy poll is interrupted. When Netlify fails,
+    the DeployError still carries the GitHub repo if the push went through.
+    """
+    cancel = threading.Event()
+    files = asyncio.create_task(asyncio.to_thread(package_site, html_str, optimize))
+    site = asyncio.create_task(asyncio.to_thread(netlify().ensure_site, team_slug, app_name))
+    result = {}
+
+    async def to_netlify():
+        (site_json, session_id), site_files = await site, await files
+        for attempt in range(2):
+            if session_id:
+                result["session_id"] = session_id
+            result["site_id"], result["site_url"] = site_json["id"], site_json["url"]
+            try:
+                # Digest deploy: only upload what Netlify doesn't already have
+                ready = await asyncio.to_thread(netlify().deploy, site_json["id"], site_files,
+                                                title=f"Volt deploy v{version}", timeout_s=DEPLOY_TIMEOUT_S,
+                                                cancel=cancel, on_building=lambda: set_state("building"))
+                break
+            except SiteNotFound:
+                # The cached site was deleted: look the name up (or create it) again
+                if attempt:
+                    raise
+                netlify().sites.forget(app_name)
+                site_json, session_id = await asyncio.to_thread(netlify().ensure_site, team_slug, app_name)
+        result["site_url"] = ready.get("url") or result["site_url"]
+
+    async def github_push():
+        token, owner, repo = github
+        await asyncio.to_thread(push_files_to_github, token, owner, repo, await files,
+                                message=f"Commit from Volt ⚡ version {version}")
+        result["github"] = f"https://github.com/{owner}/{repo}"
+
+    def pushed():
+        # What a failed deploy still reports: the repo, if the push went through
+        return {"github": result["github"]} if "github" in result else None
+
+    targets = {"Netlify": asyncio.create_task(to_netlify())}
+    if github:
+        targets["GitHub"] = asyncio.create_task(github_push())
+    try:
+        async with asyncio.timeout(DEPLOY_TIMEOUT_S):
+            outcomes = await asyncio.gather(*targets.values(), return_exceptions=True)
+    except TimeoutError:
+        raise DeployError(f"Deploy timed out after {DEPLOY_TIMEOUT_S}s", pushed()) from None
+    finally:
+        cancel.set()
+        for task in (files, site, *targets.values()):
+            task.cancel()
+
+    errors = {name: out for name, out in zip(targets, outcomes) if isinstance(out, BaseException)}
+    if "Netlify" in errors:
+        raise DeployError("; ".join(f"{name}: {err}" for name, err in errors.items()), pushed())
+    result["warnings"] = [f"{name} failed: {err}" for name, err in errors.items()]
+    return result
+
+def run_deploy(set_state, app_name, html_str, version, optimize=False, github=None):
+    """
+    Deploy job body, executed on the DeployJobs executor.
+    Runs outside the script thread, so it must not touch st.session_state:
+    everything the UI needs is returned.
+    """
+    set_state("uploading")
+    with span("deploy.total", optimize=optimize, github=bool(github)):
+        return asyncio.run(deploy_pipeline(set_state, app_name, html_str, version, optimize, github))
 
 def make_claim_link(oauth_client_id, oauth_client_secret, session_id, claim_webhook=None):
     """
@@ -253,53 +661,68 @@ def make_claim_link(oauth_client_id, oauth_client_secret, session_id, claim_webh
     if claim_webhook:
         payload["claim_webhook"] = claim_webhook
 
+    import jwt  # only needed once a site has been created
     token = jwt.encode(payload, oauth_client_secret, algorithm="HS256")
     claim_url = f"https://app.netlify.com/claim?utm_source=volt#{token}"
     return claim_url
 
-def extract_html_from_markdown(text):
-    # Look for content between any type of code block markers
-    patterns = [
-        r'```(?:html)?\n(.*?)\n```',  # Matches ```\n or ```html\n
-        r'`{3,}(.*?)`{3,}',  # Matches any number of backticks
-    ]
-    
-    for pattern in patterns:
-        matches = re.finditer(pattern, text, re.DOTALL)
-        for match in matches:
-            content = match.group(1).strip()
-            # Check if it looks like HTML
-            if content.lower().startswith(('<!doctype', '<html', '<head', '<body')):
-                return content
-            # Also check for any HTML-like content
-            if contains_html(content):
-                return content
-    return None
-
-def contains_html(text):
-    # Check for common HTML patterns
-    html_patterns = [
-        r'<!doctype\s+html.*?>',  # DOCTYPE declaration (case insensitive)
-        r'<html.*?>.*?</html>',    # Complete HTML document
-        r'<body.*?>.*?</body>',    # Body tag
-        r'<head.*?>.*?</head>',    # Head tag
-        r'<[^>]+>',               # Any HTML tag
-    ]
-    return any(re.search(pattern, text, re.IGNORECASE | re.DOTALL) for pattern in html_patterns)
-
-
-def chat_stream(chat_history, model=model):
-    """Function to call the OpenAI API and handle streaming responses"""
-    stream = openai.chat.completions.create(
-            model=model,
-            messages=chat_history,
-            stream=True,
-        )
-    for event in stream:
-        delta = event.choices[0].delta
-        if delta and delta.content:
-            # yield raw tokens (preserve newlines/markdown)
-            yield delta.content
+@st.cache_data(show_spinner=False)
+def claim_link(session_id):
+    """
+    make_claim_link() with the app's OAuth credentials, signed once per site.
+    """
+    return make_claim_link(
+        oauth_client_id=st.secrets['NETLIFY_OAUTH_CLIENT_ID'],
+        oauth_client_secret=st.secrets['NETLIFY_OAUTH_CLIENT_SECRET'],
+        session_id=session_id,
+    )
+
+def model_input(editing: bool) -> list:
+    """
+    Messages sent to the model for this turn: the compacted history (earlier
+    code replaced by placeholders, see volt.history), then the current app
+    once, just before the last message. In edit mode the edit-block
+    instructions come with it.
+    """
+    state = live()
+    history = state.chat_history
+    if st.session_state.html_version == 0:
+        return compact_history(history, CONTEXT_BUDGET_TOKENS)
+    current = f"Current index.html:\n```html\n{state.html}\n```"
+    context = {"role": "system", "content": f"{edit_prompt}\n\n{current}" if editing else current}
+    compacted = compact_history(history[:-1], CONTEXT_BUDGET_TOKENS,
+                                reserved_tokens=message_tokens(context) + message_tokens(history[-1]))
+    return compacted + [context, history[-1]]
+
+def github_target():
+    """
+    (token, owner, repo) to push to along with the deploy, or None unless the
+    user signed in with GitHub and turned on "Also push to GitHub".
+    """
+    if not st.session_state.get("push_to_github") or not st.user.get("is_logged_in"):
+        return None
+    token = get_github_token(st.user.sub)
+    return (token, st.user.nickname, st.session_state.app_name) if token else None
+
+def metrics_page():
+    """
+    Hidden admin page (?admin=<ADMIN_TOKEN>): latency percentiles per stage.
+    """
+    st.title("⚡ volt · latency")
+    windows = {"Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400, "All": None}
+    window = windows[st.selectbox("Window", list(windows), index=1)]
+    spans = tracing.load(since=time.time() - window if window else None)
+    rows = [{**row, **{k: row[k] * 1000 for k in ("p50", "p95", "p99", "max")}} for row in tracing.summarize(spans)]
+    ms = st.column_config.NumberColumn(format="%.0f ms")
+    st.dataframe(rows, use_container_width=True, hide_index=True,
+                 column_config={"p50": ms, "p95": ms, "p99": ms, "max": ms})
+    st.caption(f"{len(spans)} spans from {SPANS_PATH}")
+    load = llm_admission().stats()
+    st.caption(f"Model requests: {load['inflight']}/{LLM_MAX_INFLIGHT} in flight, {load['queued']} queued "
+               f"({load['users_waiting']} users), ~{load['tokens_last_minute']} tokens in the last minute")
+    if RESPONSE_CACHE:
+        cache = response_cache()
+        st.caption(f"Response cache: {cache.hits} hits, {cache.misses} misses since start")
 
 def fmt_duration(s: float) -> str:
     # simple "Xm Ys" formatter
@@ -322,6 +745,41 @@ def homepage():
         st.markdown("[Plop](https://plop.vibecoders.studio/)")
         st.image('img/plop.png', use_container_width =True)
 
+DEPLOY_LABELS = {"queued": "Queued ⏳", "uploading": "Uploading 📤", "building": "Building 🏗️"}
+
+@st.fragment(run_every=1.5)
+def deploy_status():
+    """
+    Show the state of this session's deploy job without blocking the script.
+    Re-runs on its own until the job finishes, then hands the result to the
+    full app through flash() and a rerun.
+    """
+    job = deploy_jobs().get(st.session_state.deploy_job)
+    if job is None:
+        st.session_state.deploy_job = None
+        st.rerun()
+    if job["state"] == "ready":
+        result = dict(job["result"])
+        warnings = result.pop("warnings", [])
+        for key, value in result.items():
+            st.session_state[key] = value
+        flash(f"✅ Deployment ready! View app: {st.session_state.site_url}", "success", balloons=True)
+        for warning in warnings:
+            flash(f"⚠️ {warning}", "error")
+    elif job["state"] == "failed":
+        for key, value in (job["result"] or {}).items():  # e.g. the repo of a push that went through
+            st.session_state[key] = value
+        flash(f"❌ Deployment failed: {job['error']}", "error", balloons=False)
+    else:
+        st.button(DEPLOY_LABELS[job["state"]], disabled=True, use_container_width=True)
+        return
+    st.session_state.deploy_job = None
+    st.rerun()
+
+if ADMIN_TOKEN and st.query_params.get("admin") == ADMIN_TOKEN:
+    metrics_page()
+    st.stop()
+
 st.logo('img/high-voltage.png')
 
 # Show queued notifications from the previous run
@@ -338,21 +796,165 @@ if st.session_state.flash:
 #     homepage()
 # else:
         
-# Sidebar for chat interface
-with st.sidebar:
+def route_turn(prompt, editing):
+    """
+    Routing decision (volt.router) for a chat turn.
+    """
+    state = live()
+    feats = features(prompt, editing, state.html, state.chat_history)
+    return route(feats, ROUTER_POLICY, default_model=model)
+
+def reply_events(input_messages, timing, decision, alternates=None):
+    """
+    Events of one assistant turn: a single stream with the routed model and
+    effort, or hedged with the HEDGE_CANDIDATES that are no slower as
+    backups (volt.router.hedge_backups). In race mode the losing
+    candidates go to `alternates`. Requests wait their turn in
+    llm_admission(), queued under the signed-in user or this session.
+    With RESPONSE_CACHE, a response to the same input, model and effort
+    is replayed instead, and new responses are stored under the routed
+    configuration whichever candidate produced them.
+    """
+    routed = {"model": decision["model"], "effort": decision["effort"]}
+    if RESPONSE_CACHE:
+        key = cache_key(input_messages, routed["model"], routed["effort"])
+        if (entry := response_cache().get(key)) is not None:
+            return replay_events(entry, timing)
+    candidates = [routed] + hedge_backups(routed, HEDGE_CANDIDATES)
+    user = st.user.get("sub") or st.session_state.user_key
+    if HEDGE_MODE == "off" or len(candidates) < 2:
+        events = stream_events(input_messages, model=routed["model"], effort=routed["effort"], timing=timing,
+                               admission=llm_admission(), user=user)
+    else:
+        events = hedged_events(input_messages, candidates, hedge_after_s=HEDGE_AFTER_S,
+                               race=HEDGE_MODE == "race", timing=timing, alternates=alternates,
+                               admission=llm_admission(), user=user)
+    return response_cache().record(key, events, **routed) if RESPONSE_CACHE else events
+
+def stream_assistant_reply(messages, input_messages, decision, alternates=None):
+    """
+    Render one assistant turn in the chat container: a live "Reasoning…"
+    status on top, the answer streamed below. Returns the answer text.
+    """
+    with messages.chat_message("assistant", avatar=avatar["assistant"]):
+        # response = st.write_stream(chat_stream(st.session_state.chat_history))
+        thinking_container = st.container()
+        answer_container = st.container()
+
+        timing = new_timing()
+
+        with thinking_container:
+            with st.status("Reasoning…", state="running", expanded=True) as status:
+                thinking_placeholder = st.empty()
+                live_html = StreamingHTMLExtractor()
+
+                def answer_stream_gen():
+                    """
+                    Iterate the Responses API stream once (see reply_events):
+                    - yield answer chunks for st.write_stream
+                    - feed the live preview
+                    - update the status box with reasoning deltas, and with
+                      the queue position while waiting for admission
+                    Deltas are coalesced (volt.stream) so each element is
+                    re-rendered at most every STREAM_FLUSH_S, and flushed at the end.
+                    """
+                    answer = Coalescer(STREAM_FLUSH_S)
+                    reasoning = Coalescer(STREAM_FLUSH_S)
+                    refusal = Coalescer(STREAM_FLUSH_S)
+
+                    def show_answer(chunk):
+                        partial = live_html.feed(chunk)
+                        if partial:
+                            with preview:
+                                st.components.v1.html(partial, height=480, scrolling=True)
+                        return chunk
+
+                    rate_limited = False
+                    for kind, text in reply_events(input_messages, timing, decision, alternates):
+                        if rate_limited and kind in ("answer", "reasoning", "refusal"):
+                            status.update(label="Reasoning…")
+                            rate_limited = False
+                        if kind == "answer":
+                            if reasoning.flush():  # the reasoning box is complete before the answer starts
+                                thinking_placeholder.markdown(reasoning.text)
+                            if chunk := answer.add(text):
+                                yield show_answer(chunk)
+                        elif kind == "reasoning":
+                            if reasoning.add(text):
+                                thinking_placeholder.markdown(reasoning.text)
+                        elif kind == "refusal":
+                            if refusal.add(text):
+                                thinking_placeholder.markdown("⚠️ The model refused: " + refusal.text)
+                        elif kind == "queued":
+                            status.update(label=f"Queued · position {text}…" if text else "Reasoning…")
+                        elif kind == "retry":
+                            status.update(label=f"Rate limited · retrying in {fmt_duration(text)}…")
+                            rate_limited = True
+
+                    if reasoning.flush():
+                        thinking_placeholder.markdown(reasoning.text)
+                    if refusal.flush():
+                        thinking_placeholder.markdown("⚠️ The model refused: " + refusal.text)
+                    if chunk := answer.flush():
+                        yield show_answer(chunk)
+
+                # Stream the assistant message (below the status box)
+                with answer_container:
+                    response = st.write_stream(answer_stream_gen())
+
+                # Close the status with elapsed time
+                if timing.get("cached"):
+                    label = "Reused an earlier response"
+                elif timing["reason_start"] and timing["reason_end"]:
+                    elapsed = timing["reason_end"] - timing["reason_start"]
+                    label = f"Thought for {fmt_duration(elapsed)}"
+                elif timing["overall_start"] and timing["overall_end"]:
+                    elapsed = timing["overall_end"] - timing["overall_start"]
+                    label = f"Responded in {fmt_duration(elapsed)}"
+                else:
+                    label = "Done."
+                status.update(label=label, state="complete", expanded=False)
+
+    if timing.get("cached"):  # keep replays out of the model latency percentiles
+        tracing.record("llm.cache_hit", timing["overall_end"] - timing["overall_start"],
+                       start=timing["overall_start"], model=timing["model"])
+    else:
+        record_stream_spans(timing, timing.get("model", decision["model"]))
+        record_decision(decision, timing)
+    return response
+
+# Main area slots, created before the sidebar so the chat can stream into the preview
+# and the fragments below can update the header without a full rerun
+header = st.container()
+with header:
+    col1, col3 = st.columns([3, 1])
+    app_label, app_details = col1.empty(), col1.empty()
+preview = st.empty()
+
+def render_app_label():
+    app_label.markdown(
+        f"**App:** {(f'[{st.session_state.app_name}]({st.session_state.site_url})' if st.session_state.get('site_url') else st.session_state.app_name)}"
+        f"{(f' ([repo]({st.session_state.github}))' if st.session_state.get('github') else '')}"
+    )
+
+def toggle_app_name_editing():
+    if st.session_state.app_name_editing:
+        commit_app_name()
+    else:
+        # enter edit mode BEFORE the input is instantiated
+        st.session_state.app_name_input = st.session_state.app_name
+        st.session_state.app_name_editing = True
+
+@st.fragment
+def app_name_editor():
+    """
+    App name field. Editing it only reruns this fragment and the header label.
+    """
     st.caption("App Name")
     c1, c2 = st.columns([5, 1])
     with c2:
         label = "💾" if st.session_state.app_name_editing else "✏️"
-        if st.button(label, use_container_width=True, key="app_name_toggle"):
-            if st.session_state.app_name_editing:
-                commit_app_name()
-                st.rerun()
-            else:
-                # enter edit mode BEFORE the input is instantiated
-                st.session_state.app_name_input = st.session_state.app_name
-                st.session_state.app_name_editing = True
-                st.rerun()
+        st.button(label, use_container_width=True, key="app_name_toggle", on_click=toggle_app_name_editing)
 
     with c1:
         st.text_input(
@@ -363,11 +965,59 @@ with st.sidebar:
             on_change=commit_app_name,        # Enter to save
             placeholder="Name your app…",
         )
-            
+    render_app_label()
+    save_session()
+
+def variant_html(variants, candidate):
+    """
+    App produced by a finished alternate: its edit blocks applied to the
+    app it was asked to edit, or a full page. None if neither works.
+    """
+    answer = candidate.answer or ""
+    # Edit blocks first: fenced as ```html or ```diff they would pass for a page
+    edits = parse_edits(answer) if variants["editing"] else []
+    if not edits:
+        return extract_html_from_markdown(answer)
+    try:
+        return apply_edits(variants["base"], edits)
+    except PatchError:
+        return None
+
+def variant_picker(variants):
+    """
+    Buttons for the alternates of the last turn (race mode), as they finish.
+    """
+    candidates = variants["candidates"]
+    ready = [(c, html) for c in candidates if c.finished.is_set() and (html := variant_html(variants, c))]
+    if ready:
+        st.caption("Variants")
+    for c, html in ready:
+        if st.button(f"🔀 Use {c.label}", key=f"variant_{id(c)}", use_container_width=True):
+            state = live()
+            state.chat_history.append({"role": "assistant", "content": c.answer})
+            show_version(state.versions.add(html))
+            st.rerun()
+    if any(not c.finished.is_set() for c in candidates):
+        variants_pending(candidates)
+
+@st.fragment(run_every=2)
+def variants_pending(candidates):
+    pending = sum(not c.finished.is_set() for c in candidates)
+    if not pending:
+        st.rerun()
+    st.caption(f"⏳ {pending} more variant{'s' if pending > 1 else ''} generating…")
+
+@st.fragment
+def chat_panel():
+    """
+    Chat, undo/redo and edit mode. Only a new or restored version of the
+    app reruns the whole page (header and preview).
+    """
+    state = live()
     prompt = st.chat_input("Enter your message here", key="chat_input")
     messages = st.container(height=450)
     # Display chat history
-    for message in st.session_state.chat_history:
+    for message in state.chat_history:
         if message["role"] != "system":  # Skip system messages
             with messages.chat_message(message["role"], avatar=avatar[message["role"]]):
                 st.write(message["content"])
@@ -378,105 +1028,58 @@ with st.sidebar:
         with messages.chat_message("user", avatar=avatar["user"]):
             st.write(prompt)
         # Append user message to chat history
-        st.session_state.chat_history.append({"role": "user", "content": prompt})
-        # Assistant UI: show a live "Reasoning…" status on top, stream answer below
-        with messages.chat_message("assistant", avatar=avatar["assistant"]):
-            # response = st.write_stream(chat_stream(st.session_state.chat_history))
-            thinking_container = st.container()
-            answer_container = st.container()
-
-            final_holder = {}
-            timing = {"overall_start": None, "overall_end": None,
-                    "reason_start": None, "reason_end": None}
-
-            with thinking_container:
-                with st.status("Reasoning…", state="running", expanded=True) as status:
-                    thinking_placeholder = st.empty()
-
-                    def answer_stream_gen():
-                        """
-                        Iterate the Responses API stream once:
-                        - yield answer chunks for st.write_stream
-                        - update the status box with reasoning deltas
-                        - capture timing and final response
-                        """
-                        timing["overall_start"] = time.time()
-                        reasoning_buf = []
-
-                        # Assumes you initialized `client = OpenAI(...)` earlier
-                        with openai.responses.stream(
-                            model=model,
-                            input=st.session_state.chat_history,
-                            reasoning={
-                                "effort": "medium",
-                                "summary": "auto"
-                                        },
-                        ) as stream:
-                            for event in stream:
-                                et = event.type
-
-                                # Final answer chunks
-                                if et == "response.output_text.delta":
-                                    yield event.delta or ""
-
-                                # Reasoning summary chunks (provider-safe)
-                                elif et in ("response.reasoning_summary_text.delta",
-                                            "response.reasoning_summary.delta"):
-                                    if timing["reason_start"] is None:
-                                        timing["reason_start"] = time.time()
-                                    delta = getattr(event, "delta", "") or ""
-                                    reasoning_buf.append(delta)
-                                    thinking_placeholder.markdown("".join(reasoning_buf))
-
-                                # Reasoning window done
-                                elif et == "response.reasoning_summary_text.done":
-                                    if timing["reason_end"] is None:
-                                        timing["reason_end"] = time.time()
-
-                                # Optional: surface refusals
-                                elif et == "response.refusal.delta":
-                                    thinking_placeholder.markdown(
-                                        "⚠️ The model refused: " + (event.delta or "")
-                                    )
-
-                            # Capture final response & close timing
-                            final_holder["resp"] = stream.get_final_response()
-                            timing["overall_end"] = time.time()
-                            if timing["reason_start"] is not None and timing["reason_end"] is None:
-                                timing["reason_end"] = timing["overall_end"]
-
-                    # Stream the assistant message (below the status box)
-                    with answer_container:
-                        response = st.write_stream(answer_stream_gen())
-
-                    # Close the status with elapsed time
-                    if timing["reason_start"] and timing["reason_end"]:
-                        elapsed = timing["reason_end"] - timing["reason_start"]
-                        label = f"Thought for {fmt_duration(elapsed)}"
-                    elif timing["overall_start"] and timing["overall_end"]:
-                        elapsed = timing["overall_end"] - timing["overall_start"]
-                        label = f"Responded in {fmt_duration(elapsed)}"
-                    else:
-                        label = "Done."
-                    status.update(label=label, state="complete", expanded=False)
-
+        state.chat_history.append({"role": "user", "content": prompt})
+        editing = st.session_state.edit_mode and st.session_state.html_version > 0
+        state.variants = {"base": state.html, "editing": editing, "candidates": []}
+        response = stream_assistant_reply(messages, model_input(editing), route_turn(prompt, editing),
+                                          state.variants["candidates"])
         # Append assistant response to chat history
-        st.session_state.chat_history.append({"role": "assistant", "content": response})
+        state.chat_history.append({"role": "assistant", "content": response})
         # Check for HTML content and update in-memory state if found
-        html_content = extract_html_from_markdown(response)
+        # Edit blocks first: fenced as ```html or ```diff they would pass for a page
+        with span("html.extract", chars=len(response)):
+            edits = parse_edits(response) if editing else []
+            html_content = None if edits else extract_html_from_markdown(response)
+        if edits:
+            try:
+                html_content = apply_edits(state.html, edits)
+            except PatchError as e:
+                # Fall back to a full regeneration
+                print(f"Edit blocks did not apply: {e}")
+                state.chat_history.append({"role": "system", "content": PATCH_FALLBACK.format(error=e)})
+                response = stream_assistant_reply(messages, model_input(editing=False), route_turn(prompt, editing=False))
+                state.chat_history.append({"role": "assistant", "content": response})
+                html_content = extract_html_from_markdown(response)
         if html_content:
             print("Found HTML content, updating in-memory state...")  # Debug print
-            st.session_state.html = html_content
-            st.session_state.html_version += 1
+            show_version(state.versions.add(html_content))
+            st.rerun()
         st.write(f"HTML Version: {st.session_state.html_version}")
-    
+
+    if state.variants and state.variants["candidates"]:
+        variant_picker(state.variants)
+
+    u1, u2 = st.columns(2)
+    versions = state.versions
+    if u1.button("↩️ Undo", use_container_width=True, disabled=not versions.can_undo):
+        show_version(versions.undo())
+        st.rerun()
+    if u2.button("↪️ Redo", use_container_width=True, disabled=not versions.can_redo):
+        show_version(versions.redo())
+        st.rerun()
+
+    st.toggle("Edit mode", key="edit_mode",
+              help="Ask the model for targeted edits to the current app instead of a full rewrite")
+
     # col1, col2 = st.columns([1, 1])
     # with col1:
     # Add reset button at the bottom of the sidebar
     if st.button("New App", type="primary", use_container_width=True):
-        st.session_state.chat_history = [{"role": "system", "content": system_prompt}]
+        state.chat_history = [{"role": "system", "content": system_prompt}]
         st.session_state.html_version = 0
-        st.session_state.html = load_default_html()
+        state.html = load_default_html()
+        state.versions = new_versions()
+        state.variants = None
         st.rerun()
     # with col2:
     #     st.button("Logout", on_click=st.logout, use_container_width=True)
@@ -484,93 +1087,79 @@ with st.sidebar:
     # if st.toggle("Debug", value=False):
     #     st.write(st.session_state.chat_history)
     #     st.write(st.user)
+    save_session()
+
+def start_deploy(target):
+    state = live()
+    versions = state.versions
+    st.session_state.deploy_job = deploy_jobs().submit(
+        run_deploy,
+        app_name=st.session_state.app_name,
+        html_str=versions.get(target) if target else state.html,
+        version=versions.timeline.index(target) + 1 if target else 0,
+        optimize=st.session_state.optimize_assets,
+        github=github_target(),
+    )
+
+@st.fragment
+def deploy_controls():
+    """
+    Version picker, Deploy button and options, plus the claim link and diff
+    on the left of the header. None of them reruns the preview.
+    """
+    versions = live().versions
+    target = versions.current
+    if len(versions) > 1:
+        target = st.selectbox(
+            "Version", versions.timeline, index=versions.cursor, label_visibility="collapsed",
+            format_func=lambda h: f"v{versions.timeline.index(h) + 1} · {h[:8]}",
+        )
+    if st.session_state.deploy_job is None:
+        st.button("🚀 Deploy App", type="primary", use_container_width=True,
+                  on_click=start_deploy, args=(target,))
+    else:
+        deploy_status()
+    st.toggle("Optimize assets", key="optimize_assets",
+              help="Minify and move large inline CSS/JS to long-cached files before deploying")
+    if st.user.get("is_logged_in"):
+        st.toggle("Also push to GitHub", key="push_to_github",
+                  help="Commit the deployed files to a private repo named after the app")
+
+    # Show the claim url and the diff to the selected version on the left
+    with app_details.container():
+        if "session_id" in st.session_state:
+            st.markdown(f"**Claim the app ➡️:** [Click Here]({claim_link(st.session_state.session_id)})")
+        if target and target != versions.current:
+            with st.expander(f"Changes from this version to v{st.session_state.html_version}"):
+                st.code(versions.diff(target, versions.current), language="diff")
+    save_session()
+
+# Sidebar for chat interface
+with st.sidebar:
+    app_name_editor()
+    chat_panel()
+
 # Main content area for HTML rendering
-with st.container():
+with header:
     # Add deployment section at the top right
     # col1, col2, col3 = st.columns([2, 1, 1])
-    col1, col3 = st.columns([3, 1])
     # Deploy button on the right
     # with col2:
     #     if st.button("🐙 Push to GitHub", use_container_width=True):
     #         GH_TOKEN = get_github_token(st.user.sub)
+    #         html_str = st.session_state.html
+    #         files = build_site(html_str) if st.session_state.optimize_assets else site_files_from_html_str(html_str)
     #         try:
-    #             create_new_repo(GH_TOKEN, st.session_state.app_name)
+    #             push_files_to_github(GH_TOKEN, st.user.nickname, st.session_state.app_name, files,
+    #                                  message=f"Commit from Volt ⚡ version {st.session_state.html_version}")
     #         except Exception as e:
     #             print(f"Error pushing to GitHub: {e}")
-    #         finally:
-    #             push_to_github(GH_TOKEN, st.user.nickname, st.session_state.app_name)
+    #         else:
     #             st.toast(f"✅ Pushed changes! View repo: [github.com/{st.user.nickname}/{st.session_state.app_name}](https://github.com/{st.user.nickname}/{st.session_state.app_name})", icon="🎉")
     #             st.session_state.github = f"https://github.com/{st.user.nickname}/{st.session_state.app_name}"
     with col3:
-        slot = st.empty()
-
-        if not st.session_state.is_deploying:
-            if slot.button("🚀 Deploy App", type="primary", use_container_width=True):
-                st.session_state.is_deploying = True
-                st.rerun()
-        else:
-            with slot.container():
-                with st.spinner("Deploying App 🚀"):
-                    try:
-                        # Ensure site exists
-                        domain = f"{st.session_state.app_name}.netlify.app"
-                        site = get_site_by_domain(domain)
-                        if site:
-                            st.session_state.site_url = site["url"]
-                            st.session_state.site_id = site["id"]
-                        else:
-                            session_id = str(uuid.uuid4())
-                            site = create_site(team_slug, st.session_state.app_name, tool="Volt⚡", session_id=session_id)
-                            st.session_state.site_url = site["url"]
-                            st.session_state.site_id = site["id"]
-                            st.session_state.session_id = session_id
-
-                        # Start Build API deploy
-                        zip_bytes = zip_from_html_str(st.session_state.html)
-                        build = deploy_zip_buildapi(
-                            pat,
-                            st.session_state.site_id,
-                            zip_bytes,
-                            title=f"Volt deploy v{st.session_state.html_version}"
-                        )
-
-                        # Extract deploy_id and poll
-                        deploy_id = (
-                            build.get("deploy_id")
-                            or build.get("deployId")
-                            or (build.get("deploy", {}) or {}).get("id")
-                        )
-                        if not deploy_id:
-                            raise RuntimeError(f"Build API response missing deploy_id: {build}")
-
-                        ready = poll_deploy_ready(pat, deploy_id, timeout_s=240, interval_s=3)
-                        st.session_state.site_url = ready.get("url", st.session_state.site_url)
-
-                        # Queue success UI for next run
-                        flash(f"✅ Deployment ready! View app: {st.session_state.site_url}", "success", balloons=True)
-
-                    except Exception as e:
-                        # Queue failure UI for next run
-                        flash(f"❌ Deployment failed: {e}", "error", balloons=False)
-
-                    finally:
-                        st.session_state.is_deploying = False
-                        st.rerun()
-
-
-    # Show app name and claim url on the left
-    with col1:
-        st.markdown(
-            f"**App:** {(f'[{st.session_state.app_name}]({st.session_state.site_url})' if st.session_state.get('site_url') else st.session_state.app_name)}"
-            f"{(f' ([repo]({st.session_state.github}))' if st.session_state.get('github') else '')}"
-        )
-        if "session_id" in st.session_state:
-            claim_url = make_claim_link(
-            oauth_client_id=st.secrets['NETLIFY_OAUTH_CLIENT_ID'],
-            oauth_client_secret=st.secrets['NETLIFY_OAUTH_CLIENT_SECRET'],
-            session_id=st.session_state.session_id,
-        )
-            st.markdown(f"**Claim the app ➡️:** [Click Here]({claim_url})")
+        deploy_controls()
     
-# Always render the HTML from session state
-st.components.v1.html(st.session_state.html, height=480, scrolling=True)
\ No newline at end of file
+# Always render the HTML of the current version
+with preview:
+    st.components.v1.html(live().html, height=480, scrolling=True)
\ No newline at end of file
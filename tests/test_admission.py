@@ -0,0 +1,119 @@
+"""
+volt.admission with a fake clock: nothing here sleeps.
+"""
+import threading
+
+from volt.admission import WINDOW_S, Admission
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def poll(admission, slot):
+    """
+    One round of wait(): what it yields before it would block again.
+    """
+    cancelled = threading.Event()
+    events = []
+    for event in admission.wait(slot, poll_s=0, cancelled=cancelled):
+        events.append(event)
+        cancelled.set()
+    return events
+
+
+def test_round_robin_order_and_position():
+    admission = Admission(max_inflight=1)
+    a1, a2, a3 = (admission.request("a", 1) for _ in range(3))
+    b1 = admission.request("b", 1)
+    c1 = admission.request("c", 1)
+
+    assert a1.granted.is_set()
+    # One request per user and turn: a's second request waits behind a2, b1 and c1
+    assert [admission.position(s) for s in (a2, b1, c1, a3)] == [1, 2, 3, 4]
+    assert admission.position(a1) == 0
+
+    order = []
+    running = a1
+    for _ in range(4):
+        admission.release(running)
+        running = next(s for s in (a2, a3, b1, c1) if s.granted.is_set() and s not in order)
+        order.append(running)
+    assert order == [a2, b1, c1, a3]
+    assert admission.stats()["queued"] == 0
+
+
+def test_new_user_waits_for_one_request_of_a_long_queue():
+    admission = Admission(max_inflight=1)
+    running = admission.request("a", 1)
+    queued = [admission.request("a", 1) for _ in range(5)]
+    late = admission.request("b", 1)
+
+    assert admission.position(late) == 2
+    admission.release(running)
+    admission.release(queued[0])
+    assert late.granted.is_set()
+    assert not any(s.granted.is_set() for s in queued[1:])
+
+
+def test_release_drops_a_waiting_slot():
+    admission = Admission(max_inflight=1)
+    running = admission.request("a", 1)
+    waiting = admission.request("b", 1)
+    admission.release(waiting)
+
+    assert admission.stats() == {"inflight": 1, "queued": 0, "users_waiting": 0, "tokens_last_minute": 1}
+    admission.release(running)
+    assert not waiting.granted.is_set()
+    assert admission.stats()["inflight"] == 0
+
+
+def test_token_window():
+    clock = FakeClock()
+    admission = Admission(max_inflight=10, tokens_per_minute=100, clock=clock)
+    first = admission.request("a", 60)
+    second = admission.request("b", 60)
+    assert first.granted.is_set() and not second.granted.is_set()
+
+    # The real usage replaces the estimate
+    admission.release(first, used_tokens=30)
+    assert second.granted.is_set()
+    assert admission.stats()["tokens_last_minute"] == 90
+
+    third = admission.request("c", 20)
+    clock.now += WINDOW_S - 1
+    assert poll(admission, third) == [("queued", 1)]
+    assert not third.granted.is_set()
+
+    clock.now += 1  # both grants leave the window
+    assert poll(admission, third) == [("queued", 1), ("queued", 0)]
+    assert admission.stats()["tokens_last_minute"] == 20
+
+
+def test_request_over_the_whole_budget_runs_alone():
+    admission = Admission(max_inflight=10, tokens_per_minute=100, clock=FakeClock())
+    big = admission.request("a", 500)
+    small = admission.request("b", 1)
+    assert big.granted.is_set() and not small.granted.is_set()
+
+
+def test_pause_holds_every_grant_until_it_expires():
+    clock = FakeClock()
+    admission = Admission(max_inflight=10, clock=clock)
+    admission.pause(5)
+    slot = admission.request("a", 1)
+    assert not slot.granted.is_set()
+
+    # A shorter pause does not cut the current one short
+    admission.pause(1)
+    clock.now += 4
+    assert poll(admission, slot) == [("queued", 1)]
+    assert not slot.granted.is_set()
+
+    clock.now += 1
+    assert poll(admission, slot) == [("queued", 1), ("queued", 0)]
+    assert slot.granted.is_set()
@@ -0,0 +1,122 @@
+"""
+volt.generate.hedged_events over a scripted stand-in for stream_events():
+candidates run on real threads, but every wait is on an event the test
+controls, so the winner never depends on timing.
+"""
+import threading
+
+import pytest
+
+from volt import generate
+
+CANDIDATES = [{"model": "a", "effort": "medium"}, {"model": "b", "effort": "low"},
+              {"model": "c", "effort": "low"}]
+
+
+class Scripted:
+    """
+    stream_events() replacement: per model, a list of steps, each a
+    (kind, text) event to yield, ("raise", exception) or ("block", event),
+    which waits until the event is set or the candidate is cancelled.
+    """
+    def __init__(self, **scripts):
+        self.scripts = scripts
+        self.started = []    # models, in launch order
+        self.cancelled = {}  # model -> the candidate's cancelled event
+
+    def __call__(self, input_messages, model, effort, timing, client, admission, user,
+                 on_open=None, cancelled=None):
+        self.started.append(model)
+        self.cancelled[model] = cancelled
+        for kind, value in self.scripts[model]:
+            if kind == "raise":
+                raise value
+            if kind == "block":
+                while not (value.wait(0.01) or cancelled.is_set()):
+                    pass
+                if cancelled.is_set():
+                    return
+                continue
+            yield kind, value
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    def install(**scripts):
+        fake = Scripted(**scripts)
+        monkeypatch.setattr(generate, "stream_events", fake)
+        return fake
+    return install
+
+
+def run(candidates=CANDIDATES, **kw):
+    timing = generate.new_timing()
+    events = list(generate.hedged_events([], candidates, timing=timing, **kw))
+    return events, timing
+
+
+def test_first_candidate_streams_alone_without_a_hedge(scripted):
+    fake = scripted(a=[("reasoning", "plan"), ("answer", "<html>"), ("answer", "</html>")])
+    events, timing = run()
+    assert events == [("reasoning", "plan"), ("answer", "<html>"), ("answer", "</html>")]
+    assert fake.started == ["a"]
+    assert (timing["model"], timing["effort"]) == ("a", "medium")
+
+
+def test_backup_wins_when_the_first_candidate_is_silent(scripted):
+    never = threading.Event()
+    fake = scripted(a=[("block", never), ("answer", "late")], b=[("answer", "fast")])
+    events, timing = run(hedge_after_s=0.01)
+    assert events == [("answer", "fast")]
+    assert fake.started == ["a", "b"]
+    assert fake.cancelled["a"].is_set()
+    assert timing["model"] == "b"
+
+
+def test_failed_candidate_is_replaced_right_away(scripted):
+    fake = scripted(a=[("raise", RuntimeError("boom"))], b=[("answer", "ok")])
+    events, timing = run()  # no hedge delay: only the error starts b
+    assert events == [("answer", "ok")]
+    assert fake.started == ["a", "b"]
+    assert timing["model"] == "b"
+
+
+def test_first_error_is_raised_when_every_candidate_fails(scripted):
+    scripted(a=[("raise", RuntimeError("a failed"))], b=[("raise", RuntimeError("b failed"))])
+    with pytest.raises(RuntimeError, match="a failed"):
+        run(CANDIDATES[:2])
+
+
+def test_error_of_the_winner_is_raised(scripted):
+    scripted(a=[("answer", "<html>"), ("raise", ValueError("cut off"))], b=[("answer", "unused")])
+    with pytest.raises(ValueError, match="cut off"):
+        run()
+
+
+def test_no_backup_while_the_first_candidate_is_queued(scripted):
+    admitted = threading.Event()
+    fake = scripted(a=[("queued", 2), ("block", admitted), ("queued", 0), ("answer", "ok")],
+                    b=[("answer", "unused")])
+    threading.Timer(0.2, admitted.set).start()  # well past hedge_after_s
+    events, _ = run(hedge_after_s=0.05)
+    assert events == [("queued", 2), ("queued", 0), ("answer", "ok")]
+    assert fake.started == ["a"]
+
+
+def test_race_keeps_the_losers_as_alternates(scripted):
+    release_b = threading.Event()
+    fake = scripted(a=[("answer", "first")], b=[("block", release_b), ("answer", "second")],
+                    c=[("raise", RuntimeError("c failed"))])
+    alternates = []
+    events, timing = run(race=True, alternates=alternates)
+    assert events == [("answer", "first")]
+    assert timing["model"] == "a"
+    assert sorted(fake.started) == ["a", "b", "c"]
+
+    assert [alt.model for alt in alternates] == ["b", "c"]
+    assert not fake.cancelled["b"].is_set()
+    release_b.set()
+    for alt in alternates:
+        assert alt.finished.wait(5)
+    assert alternates[0].answer == "second"
+    assert isinstance(alternates[1].error, RuntimeError)
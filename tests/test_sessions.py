@@ -0,0 +1,46 @@
+"""
+volt.sessions.LiveSessions with a fake clock.
+"""
+from volt.sessions import LiveSessions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idle_entries_are_dropped_and_used_ones_kept():
+    clock = FakeClock()
+    live = LiveSessions(idle_s=10, clock=clock)
+    live.put(("u", "a"), "state a")
+    live.put(("u", "b"), "state b")
+
+    clock.now += 8
+    assert live.get(("u", "a")) == "state a"
+    clock.now += 8  # b idle for 16s, a for 8s
+    assert live.get(("u", "a")) == "state a"
+    assert live.get(("u", "b")) is None
+
+    clock.now += 11
+    assert live.evict_idle() == 1
+    assert live.get(("u", "a")) is None
+
+
+def test_least_recently_used_goes_past_max_entries():
+    live = LiveSessions(idle_s=60, max_entries=2, clock=FakeClock())
+    live.put("a", 1)
+    live.put("b", 2)
+    live.get("a")
+    live.put("c", 3)
+    assert (live.get("a"), live.get("b"), live.get("c")) == (1, None, 3)
+
+
+def test_rename_moves_the_entry():
+    live = LiveSessions(idle_s=60, clock=FakeClock())
+    live.put(("u", "old"), "state")
+    live.rename(("u", "old"), ("u", "new"))
+    assert live.get(("u", "old")) is None
+    assert live.get(("u", "new")) == "state"
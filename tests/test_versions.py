@@ -0,0 +1,41 @@
+"""
+volt.versions over the object stores a deployment can use.
+"""
+import pytest
+
+from volt.sessions import SQLiteSessionStore
+from volt.versions import DirectoryObjectStore, VersionStore
+
+
+def pages(n):
+    return ["<html><body>\n" + "".join(f"<p>{i}.{j}</p>\n" for j in range(50)) + "</body></html>"
+            for i in range(n)]
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "directory"])
+def test_restore_reads_versions_through_the_object_store(tmp_path, backend):
+    def open_store():  # a fresh instance, as another replica would have
+        if backend == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+        return DirectoryObjectStore(str(tmp_path / "versions"))
+
+    versions = VersionStore(open_store(), max_memory_bytes=200)
+    texts = pages(5)
+    for text in texts:
+        versions.add(text)
+    versions.undo()
+    versions.persist()
+
+    restored = VersionStore.restore(open_store(), versions.state())
+    assert restored.current == versions.current
+    assert [restored.get(h) for h in restored.timeline] == texts
+    assert restored.redo() == versions.timeline[-1]
+
+
+def test_missing_object_is_a_key_error(tmp_path):
+    for store in (SQLiteSessionStore(str(tmp_path / "s.sqlite3")), DirectoryObjectStore(str(tmp_path / "v"))):
+        with pytest.raises(KeyError):
+            store.get_object("0" * 64)
+        store.put_object("ab", b"first")
+        store.put_object("ab", b"second")  # same key, same content: kept as is
+        assert store.get_object("ab") == b"first"
@@ -0,0 +1,5 @@
+"""
+Importable building blocks of the volt Streamlit app (streamlit_app.py).
+Nothing in this package touches Streamlit, so it can be used from scripts
+and benchmarks as well.
+"""
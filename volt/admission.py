@@ -0,0 +1,141 @@
+"""
+Process-wide admission control for model requests.
+
+Every generation asks Admission for a slot before opening its stream. At
+most `max_inflight` streams run at once, and at most `tokens_per_minute`
+estimated tokens are granted per rolling minute. Requests over either
+limit wait in one queue per user, and the queues are served round-robin:
+a user with ten queued requests delays everyone else by one request,
+not ten. After a 429, pause() stops all grants for the Retry-After
+delay instead of letting every waiting request hit the limit too.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+WINDOW_S = 60
+
+
+class Slot:
+    def __init__(self, user, tokens):
+        self.user = user
+        self.tokens = tokens
+        self.granted = threading.Event()
+        self.requested_at = time.monotonic()
+        self.window_entry = None
+
+
+class Admission:
+    def __init__(self, max_inflight=8, tokens_per_minute=0, clock=time.monotonic):
+        self.max_inflight = max_inflight
+        self.tokens_per_minute = tokens_per_minute  # 0: no token limit
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.queues = OrderedDict()  # user -> deque of waiting slots, in round-robin order
+        self.inflight = 0
+        self.window = deque()        # [granted_at, tokens] of recent grants
+        self.paused_until = 0.0
+
+    def request(self, user, tokens) -> Slot:
+        """
+        Queue a request for `tokens` estimated tokens; see wait().
+        """
+        slot = Slot(user, tokens)
+        with self.lock:
+            self.queues.setdefault(user, deque()).append(slot)
+            self._dispatch()
+        return slot
+
+    def wait(self, slot, poll_s=0.5, cancelled=None):
+        """
+        Block until slot is granted, yielding ("queued", position) whenever
+        its position in the queue changes (1 = next), and ("queued", 0) once
+        granted after waiting. Returns early (not granted) once the
+        `cancelled` event is set; release() the slot either way.
+        """
+        last = None
+        while not slot.granted.is_set():
+            if cancelled is not None and cancelled.is_set():
+                return
+            position = self.position(slot)
+            if position != last:
+                yield "queued", position
+                last = position
+            if slot.granted.wait(poll_s):
+                break
+            with self.lock:  # the token window or a pause may have expired
+                self._dispatch()
+        if last is not None:
+            yield "queued", 0
+
+    def release(self, slot, used_tokens=None):
+        """
+        Free a granted slot (correcting its token estimate with used_tokens),
+        or drop it from the queue if it was never granted.
+        """
+        with self.lock:
+            if slot.granted.is_set():
+                self.inflight -= 1
+                if used_tokens is not None and slot.window_entry is not None:
+                    slot.window_entry[1] = used_tokens
+            else:
+                queue = self.queues.get(slot.user)
+                if queue is not None and slot in queue:
+                    queue.remove(slot)
+                    if not queue:
+                        del self.queues[slot.user]
+            self._dispatch()
+
+    def pause(self, seconds):
+        """
+        Grant nothing for `seconds`, e.g. after a 429 with Retry-After.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    def position(self, slot) -> int:
+        """
+        1-based place of a waiting slot in round-robin order, 0 once granted.
+        """
+        with self.lock:
+            queues = list(self.queues.values())
+            depth = 0
+            n = 0
+            while any(depth < len(q) for q in queues):
+                for q in queues:
+                    if depth < len(q):
+                        n += 1
+                        if q[depth] is slot:
+                            return n
+                depth += 1
+        return 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            self._expire(self.clock())
+            return {"inflight": self.inflight, "queued": sum(len(q) for q in self.queues.values()),
+                    "users_waiting": len(self.queues), "tokens_last_minute": sum(t for _, t in self.window)}
+
+    def _expire(self, now):
+        while self.window and self.window[0][0] <= now - WINDOW_S:
+            self.window.popleft()
+
+    def _dispatch(self):
+        now = self.clock()
+        self._expire(now)
+        while self.queues and self.inflight < self.max_inflight and now >= self.paused_until:
+            user, queue = next(iter(self.queues.items()))
+            slot = queue[0]
+            used = sum(t for _, t in self.window)
+            # A request larger than the whole budget still runs, alone
+            if self.tokens_per_minute and self.window and used + slot.tokens > self.tokens_per_minute:
+                break
+            queue.popleft()
+            if queue:
+                self.queues.move_to_end(user)
+            else:
+                del self.queues[user]
+            slot.window_entry = [now, slot.tokens]
+            self.window.append(slot.window_entry)
+            self.inflight += 1
+            slot.granted.set()
@@ -0,0 +1,256 @@
+"""
+Headless batch generation and deployment.
+
+    python -m volt.batch prompts.txt                  # generate + deploy every prompt
+    python -m volt.batch prompts.jsonl -o gallery/    # {"prompt": ..., "name": ...} per line
+    python -m volt.batch prompts.txt --no-deploy      # only generate the HTML
+
+Prompts run on a pool of --workers threads. Model requests and deploys
+each go through their own rate limit (--openai-rpm, --deploys-per-minute),
+so a large batch runs at the quota instead of into 429s.
+
+Everything lands in the output directory:
+  <name>.html      the generated app
+  progress.jsonl   one line per finished item, appended as they finish
+  manifest.json    the latest result of every prompt, in prompt-file order
+  spans.jsonl      per-stage latency spans (volt.tracing)
+
+Running the same command again resumes: deployed prompts are skipped and
+prompts whose HTML was generated but not deployed are only deployed.
+
+Credentials come from the environment or, for anything unset, from the
+app's .streamlit/secrets.toml: OPENAI_API_KEY, OPENAI_BASE_URL (optional),
+NETLIFY_PAT, NETLIFY_TEAM_SLUG, NETLIFY_API_BASE (optional).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+from volt import tracing
+from volt.build import build_site
+from volt.generate import DEFAULT_EFFORT, DEFAULT_MODEL, generate
+from volt.netlify import API_BASE, Netlify, SiteNotFound, site_files_from_html_str
+from volt.tracing import span
+
+DEPLOY_TIMEOUT_S = 300
+SECRET_KEYS = ("OPENAI_API_KEY", "OPENAI_BASE_URL", "NETLIFY_PAT", "NETLIFY_TEAM_SLUG", "NETLIFY_API_BASE")
+
+
+class RateLimiter:
+    """
+    At most `per_minute` acquire() calls per minute across all threads,
+    spaced evenly. per_minute=0 disables the limit.
+    """
+    def __init__(self, per_minute):
+        self.interval = 60 / per_minute if per_minute else 0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def load_secrets(path):
+    secrets = {}
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            secrets = tomllib.load(f)
+    return {key: os.environ.get(key) or secrets.get(key) for key in SECRET_KEYS}
+
+
+def app_name(prompt, prefix=""):
+    """
+    Stable Netlify site name for a prompt: its first words plus a short hash,
+    so rerunning the batch finds the same site.
+    """
+    words = re.findall(r"[a-z0-9]+", prompt.lower())
+    slug = "-".join(words)[:40].strip("-") or "app"
+    digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:6]
+    return f"{prefix}{slug}-{digest}"
+
+
+def load_prompts(path, prefix=""):
+    """
+    [{"name", "prompt"}] from a .jsonl file ({"prompt", optional "name"}
+    per line) or a text file (one prompt per line, # comments).
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or (line.startswith("#") and not path.endswith(".jsonl")):
+                continue
+            item = json.loads(line) if path.endswith(".jsonl") else {"prompt": line}
+            item.setdefault("name", app_name(item["prompt"], prefix))
+            items.append(item)
+    names = [item["name"] for item in items]
+    if len(set(names)) != len(names):
+        raise SystemExit(f"Duplicate app names in {path}")
+    return items
+
+
+def load_progress(path) -> dict:
+    """
+    Latest record per app name from progress.jsonl.
+    """
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                done[record["name"]] = record
+    return done
+
+
+class Batch:
+    def __init__(self, args, secrets, system_prompt):
+        self.args = args
+        self.team_slug = secrets["NETLIFY_TEAM_SLUG"]
+        self.system_prompt = system_prompt
+        self.client = openai.OpenAI(api_key=secrets["OPENAI_API_KEY"], base_url=secrets["OPENAI_BASE_URL"])
+        self.netlify = None
+        if not args.no_deploy:
+            self.netlify = Netlify(secrets["NETLIFY_PAT"], api_base=secrets["NETLIFY_API_BASE"] or API_BASE,
+                                   manifests_path=os.path.join(args.out, "deploy_manifests.json"),
+                                   sites_path=os.path.join(args.out, "deploy_sites.json"))
+        self.openai_limit = RateLimiter(args.openai_rpm)
+        self.deploy_limit = RateLimiter(args.deploys_per_minute)
+        self.progress_path = os.path.join(args.out, "progress.jsonl")
+        self.lock = threading.Lock()
+
+    def html_path(self, name):
+        return os.path.join(self.args.out, f"{name}.html")
+
+    def run_item(self, item, previous):
+        """
+        Generate (unless the HTML is already on disk) and deploy one prompt.
+        Returns its progress record; failures are recorded, not raised.
+        """
+        record = {"name": item["name"], "prompt": item["prompt"], "status": "generated", "error": None}
+        path = self.html_path(item["name"])
+        try:
+            if previous and previous.get("html_sha") and os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    html = f.read()
+                record.update(html_sha=previous["html_sha"], generate_s=previous.get("generate_s"))
+            else:
+                self.openai_limit.acquire()
+                t = time.perf_counter()
+                result = generate([{"role": "system", "content": self.system_prompt},
+                                   {"role": "user", "content": item["prompt"]}],
+                                  model=item.get("model", self.args.model), effort=self.args.effort,
+                                  client=self.client)
+                record["generate_s"] = round(time.perf_counter() - t, 3)
+                html = result["html"]
+                if html is None:
+                    raise RuntimeError("No HTML in the answer")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(html)
+                record["html_sha"] = hashlib.sha1(html.encode("utf-8")).hexdigest()
+            if self.netlify:
+                record.update(self.deploy(item["name"], html))
+                record["status"] = "ready"
+        except Exception as e:
+            record.update(status="failed", error=f"{type(e).__name__}: {e}")
+        record["finished"] = time.time()
+        return record
+
+    def deploy(self, name, html):
+        files = build_site(html) if self.args.optimize else site_files_from_html_str(html)
+        self.deploy_limit.acquire()
+        t = time.perf_counter()
+        with span("deploy.total", optimize=self.args.optimize, batch=True):
+            site, session_id = self.netlify.ensure_site(self.team_slug, name)
+            try:
+                ready = self.netlify.deploy(site["id"], files, title=f"Volt batch: {name}", timeout_s=DEPLOY_TIMEOUT_S)
+            except SiteNotFound:
+                self.netlify.sites.forget(name)
+                site, session_id = self.netlify.ensure_site(self.team_slug, name)
+                ready = self.netlify.deploy(site["id"], files, title=f"Volt batch: {name}", timeout_s=DEPLOY_TIMEOUT_S)
+        out = {"site_id": site["id"], "url": ready.get("ssl_url") or ready.get("url") or site.get("url"),
+               "deploy_id": ready.get("id"), "deploy_s": round(time.perf_counter() - t, 3)}
+        if session_id:
+            out["session_id"] = session_id
+        return out
+
+    def save(self, record):
+        with self.lock, open(self.progress_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def run(self, items):
+        progress = load_progress(self.progress_path)
+        target = "generated" if self.args.no_deploy else "ready"
+        todo = [item for item in items
+                if progress.get(item["name"], {}).get("status") not in (target, "ready")]
+        print(f"{len(items) - len(todo)} of {len(items)} already done, {len(todo)} to go")
+        if self.netlify and todo:
+            # One listing instead of a lookup per new app name
+            print(f"{self.netlify.warm_site_cache(self.team_slug)} existing sites")
+        with ThreadPoolExecutor(max_workers=self.args.workers, thread_name_prefix="volt-batch") as pool:
+            futures = [pool.submit(self.run_item, item, progress.get(item["name"])) for item in todo]
+            for i, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                self.save(record)
+                progress[record["name"]] = record
+                detail = record.get("url") or record["error"] or self.html_path(record["name"])
+                print(f"[{i}/{len(todo)}] {record['status']:<9} {record['name']}  {detail}")
+        manifest = [progress[item["name"]] for item in items if item["name"] in progress]
+        with open(os.path.join(self.args.out, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m volt.batch",
+                                     description="Generate and deploy many volt apps from a prompt file.")
+    parser.add_argument("prompts", help="text file (one prompt per line) or .jsonl ({\"prompt\", \"name\"})")
+    parser.add_argument("-o", "--out", default="batch", help="output directory (default: batch)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--openai-rpm", type=float, default=60, help="model requests per minute (0: no limit)")
+    parser.add_argument("--deploys-per-minute", type=float, default=3, help="Netlify deploys per minute (0: no limit)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--effort", default=DEFAULT_EFFORT, help="reasoning effort")
+    parser.add_argument("--optimize", action="store_true", help="run volt.build.build_site before deploying")
+    parser.add_argument("--no-deploy", action="store_true", help="only generate the HTML files")
+    parser.add_argument("--prefix", default="", help="prepended to generated app names")
+    parser.add_argument("--system-prompt", default="system_prompt.md")
+    parser.add_argument("--secrets", default=os.path.join(".streamlit", "secrets.toml"))
+    args = parser.parse_args(argv)
+
+    secrets = load_secrets(args.secrets)
+    required = ["OPENAI_API_KEY"] + ([] if args.no_deploy else ["NETLIFY_PAT", "NETLIFY_TEAM_SLUG"])
+    missing = [key for key in required if not secrets[key]]
+    if missing:
+        parser.error(f"missing {', '.join(missing)} (environment or {args.secrets})")
+    with open(args.system_prompt, encoding="utf-8") as f:
+        system_prompt = f.read()
+
+    os.makedirs(args.out, exist_ok=True)
+    tracing.configure(os.path.join(args.out, "spans.jsonl"))
+    manifest = Batch(args, secrets, system_prompt).run(load_prompts(args.prompts, args.prefix))
+    failed = [r["name"] for r in manifest if r["status"] == "failed"]
+    if failed:
+        sys.exit(f"{len(failed)} failed: {', '.join(failed)} (run again to retry)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Optional build stage run before deploying a generated app.
+
+build_site() turns the single index.html into a small static site:
+- inline <style>/<script> blocks of at least `split_min_bytes` move to
+  /assets/<name>.<hash>.css|js, named after their content so they can be
+  cached forever
+- CSS is minified, HTML comments and whitespace between tags are removed
+- a Netlify _headers file marks /assets/* immutable and keeps index.html
+  revalidated, so new deploys show up immediately
+
+JavaScript is moved but not minified: without a real parser, rewriting
+it risks breaking strings, template literals and regex literals.
+Netlify already serves every file with gzip/brotli, so nothing is
+pre-compressed here.
+"""
+import hashlib
+import re
+
+ASSETS_DIR = "/assets"
+HEADERS = f"""{ASSETS_DIR}/*
+  Cache-Control: public, max-age=31536000, immutable
+/
+  Cache-Control: public, max-age=0, must-revalidate
+/index.html
+  Cache-Control: public, max-age=0, must-revalidate
+"""
+
+INLINE_BLOCK = re.compile(r'<(style|script)\b([^>]*)>(.*?)</\1\s*>', re.IGNORECASE | re.DOTALL)
+# Script types that are JavaScript and can be loaded from a src= file
+JS_TYPES = ("", "text/javascript", "application/javascript", "module")
+# Elements whose content must be left exactly as is
+RAW_BLOCK = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+CSS_TOKENS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+', re.DOTALL)
+CSS_TRIM = re.compile(r'\s*([{};,])\s*|:\s+')
+
+
+def is_build_output(path) -> bool:
+    """
+    Whether path is a file that build_site() may add besides index.html.
+    """
+    path = "/" + path.lstrip("/")
+    return path == "/_headers" or path.startswith(ASSETS_DIR + "/")
+
+
+def build_site(html, split_min_bytes=2048, minify=True):
+    """
+    Return {path: bytes} for a file digest deploy (see deploy_digest).
+    """
+    files = {}
+
+    def extract(m):
+        tag, attrs, body = m.group(1).lower(), m.group(2), m.group(3)
+        kind = _attr(attrs, "type").lower()
+        if len(body.encode("utf-8")) < split_min_bytes or _attr(attrs, "src"):
+            if tag == "style" and minify:
+                return f"<{m.group(1)}{attrs}>{minify_css(body)}</{m.group(1)}>"
+            return m.group(0)
+        if tag == "style":
+            if kind not in ("", "text/css"):
+                return m.group(0)
+            path = _asset_path("style", "css", minify_css(body) if minify else body, files)
+            media = _attr(attrs, "media")
+            media = f' media="{media}"' if media else ""
+            return f'<link rel="stylesheet" href="{path}"{media}>'
+        if kind not in JS_TYPES:
+            return m.group(0)  # JSON, importmap, templates...
+        path = _asset_path("app", "js", body, files)
+        return f'<script{attrs} src="{path}"></script>'
+
+    html = INLINE_BLOCK.sub(extract, html)
+    if minify:
+        html = minify_html(html)
+    files["/index.html"] = html.encode("utf-8")
+    files["/_headers"] = HEADERS.encode("utf-8")
+    return files
+
+
+def minify_css(css):
+    """
+    Drop comments and the whitespace that carries no meaning; strings are kept.
+    """
+    def token(m):
+        t = m.group(0)
+        if t[0] in "\"'":
+            return t
+        return "" if t.startswith("/*") else " "
+    css = CSS_TOKENS.sub(token, css)
+    # Strings were kept verbatim above; only trim outside of them
+    parts = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', css)
+    for i in range(0, len(parts), 2):
+        parts[i] = CSS_TRIM.sub(lambda m: m.group(1) or ":", parts[i]).replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_html(html):
+    """
+    Remove comments and whitespace between tags outside of
+    <pre>/<textarea>/<script>/<style>. Runs of whitespace between tags are
+    kept as one character, since browsers render them as one space anyway.
+    """
+    out = []
+    pos = 0
+    for m in RAW_BLOCK.finditer(html):
+        out.append(_squeeze(html[pos:m.start()]))
+        out.append(m.group(0))
+        pos = m.end()
+    out.append(_squeeze(html[pos:]))
+    return "".join(out).strip()
+
+
+def _squeeze(fragment):
+    fragment = re.sub(r'<!--(?!\[if).*?-->', "", fragment, flags=re.DOTALL)
+    # Fragments start right after and end right before a raw block's tags
+    return re.sub(r'(^|>)(\s+)(?=<|$)',
+                  lambda m: m.group(1) + ("\n" if "\n" in m.group(2) else " "), fragment)
+
+
+def _attr(attrs, name):
+    m = re.search(rf'\b{name}\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', attrs, re.IGNORECASE)
+    return (m.group(1) or m.group(2) or m.group(3) or "") if m else ""
+
+
+def _asset_path(name, ext, content, files):
+    data = content.encode("utf-8")
+    path = f"{ASSETS_DIR}/{name}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}"
+    files[path] = data
+    return path
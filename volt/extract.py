@@ -0,0 +1,177 @@
+"""
+Find the generated HTML in a model answer.
+
+extract_html_from_markdown walks the backtick fences of the answer once,
+so it stays linear on the 50-200 KB answers we get for games and
+dashboards, and on malformed output (unclosed fences, stray `<`).
+"""
+import re
+import time
+
+HTML_PREFIXES = ('<!doctype', '<html', '<head', '<body')
+
+
+def _backtick_runs(text):
+    """
+    (start, length) of every run of 3 or more backticks, in order.
+    """
+    runs = []
+    pos = text.find('```')
+    while pos != -1:
+        end = pos + 3
+        while end < len(text) and text[end] == '`':
+            end += 1
+        runs.append((pos, end - pos))
+        pos = text.find('```', end)
+    return runs
+
+
+def _looks_like_html(content):
+    return content[:9].lower().startswith(HTML_PREFIXES) or contains_html(content)
+
+
+def _fenced_blocks(text, runs):
+    """
+    Blocks opened by ``` or ```html plus a newline and closed by the next
+    newline followed by ```, like the regex r'```(?:html)?\n(.*?)\n```'.
+    """
+    pos = 0  # end of the previous block; a closing run can open the next one
+    i = 0
+    while i < len(runs):
+        start, length = runs[i]
+        opener = start + length - 3  # only the last 3 backticks can precede html/newline
+        i += 1
+        if opener < pos:
+            continue
+        after = opener + 3
+        if text.startswith('html\n', after):
+            content_start = after + 5
+        elif text.startswith('\n', after):
+            content_start = after + 1
+        else:
+            continue
+        # Closing fence: first run at or after content_start preceded by a newline
+        j = i - 1
+        while j < len(runs) and not (runs[j][0] - 1 >= content_start and text[runs[j][0] - 1] == '\n'):
+            j += 1
+        if j == len(runs):
+            return  # no later block can be closed either
+        close = runs[j][0]
+        yield text[content_start:close - 1]
+        pos = close + 3
+        i = j
+
+
+def _backtick_blocks(text, runs):
+    """
+    Text between consecutive runs of 3+ backticks, like r'`{3,}(.*?)`{3,}'.
+    """
+    for k in range(0, len(runs) - 1, 2):
+        (o_start, o_len), (c_start, _) = runs[k], runs[k + 1]
+        yield text[o_start + o_len:c_start]
+
+
+def extract_html_from_markdown(text):
+    """
+    Return the first fenced block that looks like HTML, or None.
+    ```html / ``` blocks are preferred over loosely fenced ones.
+    """
+    runs = _backtick_runs(text)
+    for blocks in (_fenced_blocks(text, runs), _backtick_blocks(text, runs)):
+        for block in blocks:
+            content = block.strip()
+            if _looks_like_html(content):
+                return content
+    return None
+
+
+def contains_html(text):
+    """
+    True if text contains something shaped like a tag (`<` + at least one
+    character + `>`), which is what r'<[^>]+>' detects.
+    """
+    lt = text.find('<')
+    while lt != -1 and text.startswith('<>', lt):
+        lt = text.find('<', lt + 1)
+    return lt != -1 and text.find('>', lt + 2) != -1
+
+
+class StreamingHTMLExtractor:
+    """
+    Incremental counterpart of extract_html_from_markdown for a token stream.
+    feed() each chunk as it arrives; once a ```html fence has opened it returns
+    the HTML received so far, cut after the last closing tag that is not inside
+    a <script>/<style> block, at most every `min_interval_s` seconds.
+    Otherwise it returns None.
+    """
+    FENCE_OPEN = re.compile(r'```html[ \t]*\n', re.IGNORECASE)
+    TOKENS = re.compile(r'<(/?)(script|style)\b[^>]*>|</[a-zA-Z][\w-]{0,30}\s*>|\n```', re.IGNORECASE)
+    OVERLAP = 64  # fits every token TOKENS can match, but an opening <script>/<style> tag
+    PENDING_RAW = re.compile(r'<(script|style)\b[^>]{0,4096}\Z', re.IGNORECASE)  # ...kept whole up to 4 KB
+
+    def __init__(self, min_interval_s=0.4):
+        self.min_interval_s = min_interval_s
+        self.head = ""     # text before the fence (usually one sentence)
+        self.body = []     # chunks after the fence
+        self.body_len = 0
+        self.tail = ""     # last OVERLAP chars of the body, to match tokens split across chunks
+        self.raw_depth = 0 # inside <script>/<style>
+        self.cut = 0       # end of the last safe closing tag in the body
+        self.sent = 0      # cut that was last returned
+        self.closed = False
+        self.last_emit = 0.0
+
+    def feed(self, chunk: str):
+        if self.closed or not chunk:
+            return None
+        if not self.body_len and not self.body:
+            start = max(0, len(self.head) - 16)
+            self.head += chunk
+            m = self.FENCE_OPEN.search(self.head, start)
+            if not m:
+                return None
+            chunk = self.head[m.end():]
+            self.body.append("")  # fence seen, even if nothing follows yet
+            if not chunk:
+                return None
+        self._scan(chunk)
+        now = time.monotonic()
+        if self.cut > self.sent and (self.closed or now - self.last_emit >= self.min_interval_s):
+            self.sent, self.last_emit = self.cut, now
+            return self.html()[:self.cut]
+        return None
+
+    def html(self) -> str:
+        return "".join(self.body)
+
+    def _scan(self, chunk):
+        window = self.tail + chunk
+        base = self.body_len - len(self.tail)
+        for m in self.TOKENS.finditer(window):
+            if m.end() <= len(self.tail):
+                continue  # already seen with the previous chunk
+            tok = m.group(0)
+            if tok == "\n```":
+                if not self.raw_depth:
+                    end = base + m.start()  # the fence may have started in the previous chunk
+                    self.body = [(self.html() + chunk)[:end]]
+                    self.body_len = self.cut = end
+                    self.closed = True
+                    return
+                continue
+            if m.group(2):
+                if m.group(1):
+                    self.raw_depth = max(0, self.raw_depth - 1)
+                    if not self.raw_depth:
+                        self.cut = base + m.end()
+                else:
+                    self.raw_depth += 1
+            elif not self.raw_depth:
+                self.cut = base + m.end()
+        self.body.append(chunk)
+        self.body_len += len(chunk)
+        # An opening <script ...> or <style ...> tag can be any length: until its > arrives,
+        # keep all of it so it is matched once complete
+        pending = self.PENDING_RAW.search(window)
+        start = len(window) - self.OVERLAP
+        self.tail = window[max(0, min(start, pending.start()) if pending else start):]
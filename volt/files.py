@@ -0,0 +1,21 @@
+"""
+Small file helpers shared by the on-disk caches.
+"""
+import os
+import uuid
+
+
+def write_atomic(path, data):
+    """
+    Write data (bytes or str) to path through a temporary file and
+    os.replace(), so concurrent readers never see a torn file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    if isinstance(data, str):
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        with open(tmp, "wb") as f:
+            f.write(data)
+    os.replace(tmp, path)
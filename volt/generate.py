@@ -0,0 +1,348 @@
+"""
+App generation with the OpenAI Responses API.
+
+stream_events() iterates one streamed response as (kind, text) pairs, so
+the Streamlit chat and the batch CLI consume the same stream.
+hedged_events() does the same over several model configurations to cut
+tail latency. generate() runs a whole turn without a UI and extracts the
+HTML from the answer. Given an `admission` (volt.admission.Admission),
+requests wait for a slot before they are sent.
+"""
+import queue
+import random
+import threading
+import time
+
+import openai
+
+from volt import tracing
+from volt.extract import extract_html_from_markdown
+from volt.history import message_tokens
+
+DEFAULT_MODEL = "gpt-5-nano"
+DEFAULT_EFFORT = "medium"
+OUTPUT_TOKENS_ESTIMATE = 8000  # charged to the token budget until the real usage is known
+RATE_LIMIT_RETRIES = 4
+
+
+def new_timing() -> dict:
+    """
+    Timestamps filled in by stream_events(), see record_stream_spans().
+    """
+    return {"overall_start": None, "overall_end": None, "first_token": None,
+            "reason_start": None, "reason_end": None}
+
+
+def chat_stream(chat_history, model=DEFAULT_MODEL, client=openai):
+    """Function to call the OpenAI API and handle streaming responses"""
+    stream = client.chat.completions.create(
+            model=model,
+            messages=chat_history,
+            stream=True,
+        )
+    for event in stream:
+        delta = event.choices[0].delta
+        if delta and delta.content:
+            # yield raw tokens (preserve newlines/markdown)
+            yield delta.content
+
+
+def open_stream(input_messages, model=DEFAULT_MODEL, effort=DEFAULT_EFFORT, client=openai):
+    """
+    Responses API stream manager for one turn; enter it to send the request.
+    """
+    return client.responses.stream(
+        model=model,
+        input=input_messages,
+        reasoning={
+            "effort": effort,
+            "summary": "auto"
+                    },
+    )
+
+
+def estimate_request_tokens(input_messages) -> int:
+    return sum(map(message_tokens, input_messages)) + OUTPUT_TOKENS_ESTIMATE
+
+
+def retry_delay(error, attempt) -> float:
+    """
+    Seconds to wait before retrying a 429: its Retry-After header if any,
+    else exponential backoff with jitter.
+    """
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return min(30, 2 ** attempt) * random.uniform(0.5, 1)
+
+
+def iter_events(stream, timing):
+    """
+    (kind, text) pairs of an open stream, see stream_events().
+    """
+    for event in stream:
+        et = event.type
+
+        # Final answer chunks
+        if et == "response.output_text.delta":
+            if timing["first_token"] is None:
+                timing["first_token"] = time.time()
+            yield "answer", event.delta or ""
+
+        # Reasoning summary chunks (provider-safe)
+        elif et in ("response.reasoning_summary_text.delta",
+                    "response.reasoning_summary.delta"):
+            if timing["reason_start"] is None:
+                timing["reason_start"] = time.time()
+            yield "reasoning", getattr(event, "delta", "") or ""
+
+        # Reasoning window done
+        elif et == "response.reasoning_summary_text.done":
+            if timing["reason_end"] is None:
+                timing["reason_end"] = time.time()
+
+        # Optional: surface refusals
+        elif et == "response.refusal.delta":
+            yield "refusal", event.delta or ""
+
+    # Close timing once the full response is in
+    response = stream.get_final_response()
+    timing["overall_end"] = time.time()
+    timing["tokens"] = getattr(getattr(response, "usage", None), "total_tokens", None)
+    if timing["reason_start"] is not None and timing["reason_end"] is None:
+        timing["reason_end"] = timing["overall_end"]
+
+
+def stream_events(input_messages, model=DEFAULT_MODEL, effort=DEFAULT_EFFORT, timing=None, client=openai,
+                  admission=None, user=None, on_open=None, cancelled=None):
+    """
+    Iterate the Responses API stream once, yielding:
+    - ("answer", text): final answer chunks
+    - ("reasoning", text): reasoning summary chunks
+    - ("refusal", text): refusal chunks
+    - ("queued", position): waiting for an `admission` slot as `user`,
+      then ("queued", 0) once admitted
+    - ("retry", seconds): rate limited (429), retrying after seconds
+    and capturing timestamps in `timing` (see new_timing()).
+    `client` is the openai module (configured globally, with
+    openai.max_retries = 0) or an OpenAI client, whose own retries are
+    turned off: 429s are retried here so that they pause the admission queue.
+    `on_open(stream)` gets the open stream, e.g. to close it from another
+    thread; setting the `cancelled` event gives up a place in the queue.
+    """
+    timing = timing if timing is not None else new_timing()
+    timing["overall_start"] = time.time()
+    slot = admission.request(user, estimate_request_tokens(input_messages)) if admission is not None else None
+    try:
+        if slot is not None and not slot.granted.is_set():
+            yield from admission.wait(slot, cancelled=cancelled)
+            if not slot.granted.is_set():
+                return
+            tracing.record("llm.queue", time.time() - timing["overall_start"], start=timing["overall_start"],
+                           model=model)
+        if hasattr(client, "with_options"):  # the openai module has no with_options()
+            client = client.with_options(max_retries=0)
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                with open_stream(input_messages, model, effort, client) as stream:
+                    if on_open is not None:
+                        on_open(stream)
+                    yield from iter_events(stream, timing)
+                return
+            except openai.RateLimitError as e:
+                # Raised when the request is sent, so nothing was yielded yet
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                delay = retry_delay(e, attempt)
+                if admission is not None:
+                    admission.pause(delay)  # nobody else should walk into the same limit
+                yield "retry", delay
+                time.sleep(delay)
+    finally:
+        if slot is not None:
+            admission.release(slot, timing.get("tokens"))
+
+
+class Candidate:
+    """
+    One request of a hedged generation (see hedged_events), streamed on its
+    own thread into a queue shared with the other candidates as
+    (candidate, kind, text) tuples, ending with kind "done" or "error".
+    The full answer is kept in `answer` once `finished` is set.
+    """
+    def __init__(self, input_messages, model, effort, client, out, admission=None, user=None):
+        self.input_messages = input_messages
+        self.model = model
+        self.effort = effort
+        self.client = client
+        self.out = out
+        self.admission = admission
+        self.user = user
+        self.timing = new_timing()
+        self.answer = None
+        self.error = None
+        self.stream = None
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+
+    @property
+    def label(self):
+        return f"{self.model} · {self.effort}"
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"volt-llm-{self.label}", daemon=True).start()
+        return self
+
+    def cancel(self):
+        """
+        Stop streaming: drop further events and close the HTTP response.
+        """
+        self.cancelled.set()
+        try:
+            if self.stream is not None:
+                self.stream.close()
+        except Exception:
+            pass
+
+    def _opened(self, stream):
+        self.stream = stream
+
+    def _run(self):
+        parts = []
+        events = stream_events(self.input_messages, self.model, self.effort, self.timing, self.client,
+                               self.admission, self.user, on_open=self._opened, cancelled=self.cancelled)
+        try:
+            for kind, text in events:
+                if self.cancelled.is_set():
+                    return
+                if kind == "answer":
+                    parts.append(text)
+                self.out.put((self, kind, text))
+            self.answer = "".join(parts)
+            self.out.put((self, "done", None))
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.error = e
+                self.out.put((self, "error", e))
+        finally:
+            events.close()  # gives back the admission slot
+            self.finished.set()
+
+
+def hedged_events(input_messages, candidates, hedge_after_s=None, race=False, timing=None,
+                  client=openai, alternates=None, admission=None, user=None):
+    """
+    stream_events() over several model configurations (dicts with "model"
+    and "effort"), streaming whichever produces output first:
+
+    - race=False (hedging): start candidates[0]; whenever no candidate has
+      produced output hedge_after_s later, start the next one. Losers are
+      cancelled.
+    - race=True: start them all at once. Losers keep running and are
+      appended to `alternates` (a list) so their answers can be offered as
+      variants once they finish.
+
+    A candidate that fails before any output just drops out (the next one
+    starts right away); if all fail the first error is raised. "queued" and
+    "retry" events of the first candidate still standing are passed
+    through, and no backup is started while a candidate waits for
+    admission: the hedge delay counts from when it was admitted. `timing` gets
+    the winner's timestamps, measured from the first request, plus its
+    "model" and "effort"; an llm.hedge span records who won.
+    """
+    timing = timing if timing is not None else new_timing()
+    timing["overall_start"] = started = time.time()
+    out = queue.Queue()
+    running, errors = [], []
+
+    def launch():
+        spec = candidates[len(running)]
+        running.append(Candidate(input_messages, spec["model"], spec["effort"], client, out,
+                                 admission, user).start())
+
+    launch()
+    while race and len(running) < len(candidates):
+        launch()
+    next_hedge = time.monotonic() + hedge_after_s if hedge_after_s is not None else None
+    winner = None
+    waiting = set()  # candidates queued for admission
+    try:
+        while winner is None:
+            can_hedge = next_hedge is not None and len(running) < len(candidates)
+            try:
+                c, kind, text = out.get(timeout=max(0, next_hedge - time.monotonic()) if can_hedge else None)
+            except queue.Empty:
+                # A backup would only queue behind it
+                if not waiting:
+                    launch()
+                next_hedge = time.monotonic() + hedge_after_s
+                continue
+            if kind == "queued":
+                if text:
+                    waiting.add(c)
+                else:
+                    waiting.discard(c)
+                    if next_hedge is not None:
+                        next_hedge = time.monotonic() + hedge_after_s
+            if kind in ("queued", "retry"):
+                if c is next((cand for cand in running if cand.error is None), None):
+                    yield kind, text
+                continue
+            if kind == "error":
+                errors.append(text)
+                waiting.discard(c)
+                if len(running) < len(candidates):
+                    launch()
+                elif len(errors) == len(running):
+                    raise errors[0]
+                continue
+            winner = c
+
+        for loser in running:
+            if loser is winner:
+                continue
+            if race and alternates is not None:
+                alternates.append(loser)
+            else:
+                loser.cancel()
+        tracing.record("llm.hedge", time.time() - started, start=started, model=winner.model,
+                       effort=winner.effort, launched=len(running), race=race)
+
+        while True:
+            if c is winner:
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise text
+                yield kind, text
+            c, kind, text = out.get()
+    finally:
+        for cand in running:
+            if cand is winner or winner is None or not race:
+                cand.cancel()
+        timing.update({k: v for k, v in (winner or running[0]).timing.items() if k != "overall_start"})
+        timing["model"] = (winner or running[0]).model
+        timing["effort"] = (winner or running[0]).effort
+
+def record_stream_spans(timing: dict, model=DEFAULT_MODEL):
+    """
+    Turn the timestamps captured while streaming into llm.* spans.
+    """
+    for name, a, b in (("llm.ttft", "overall_start", "first_token"),
+                       ("llm.reasoning", "reason_start", "reason_end"),
+                       ("llm.answer", "first_token", "overall_end"),
+                       ("llm.total", "overall_start", "overall_end")):
+        if timing[a] and timing[b]:
+            tracing.record(name, timing[b] - timing[a], start=timing[a], model=model)
+
+
+def generate(input_messages, model=DEFAULT_MODEL, effort=DEFAULT_EFFORT, client=openai) -> dict:
+    """
+    One non-interactive turn: {"answer", "html" (None if the answer has no
+    HTML), "timing"}.
+    """
+    timing = new_timing()
+    answer = "".join(text for kind, text in stream_events(input_messages, model, effort, timing, client)
+                     if kind == "answer")
+    record_stream_spans(timing, model)
+    return {"answer": answer, "html": extract_html_from_markdown(answer), "timing": timing}
@@ -0,0 +1,74 @@
+"""
+Keep the model input small as a session grows.
+
+chat_history keeps every answer in full, so by turn ten it holds ten
+copies of the app. compact_history() replaces the code blocks of earlier
+answers with a one-line placeholder (the current HTML is sent once, at the
+end, by the caller) and drops the oldest turns when the estimated size is
+over budget. The system prompt and the compacted form of a message never
+change from one turn to the next, so the start of the input stays
+byte-identical and provider-side prompt caching keeps hitting.
+"""
+
+CHARS_PER_TOKEN = 3  # conservative for HTML/JS-heavy text
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + 4  # role and message framing
+
+
+def strip_code_blocks(text):
+    """
+    Replace every closed ``` block with a placeholder giving its language and size.
+    """
+    out = []
+    pos = 0
+    while True:
+        start = text.find("```", pos)
+        if start == -1:
+            break
+        eol = text.find("\n", start)
+        end = text.find("\n```", eol) if eol != -1 else -1
+        if end == -1:
+            break
+        lang = text[start + 3:eol].strip() or "code"
+        lines = text.count("\n", eol + 1, end) + 1
+        out.append(text[pos:start])
+        out.append(f"[earlier {lang} omitted ({lines} lines); the current version is included below]")
+        pos = end + 4
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def compact_history(history, budget_tokens, reserved_tokens=0):
+    """
+    Return a copy of history fit to send to the model.
+    - history[0] (the system prompt) is kept as is
+    - code blocks in assistant messages are replaced by placeholders
+    - the oldest turns are dropped until the estimate, plus reserved_tokens
+      for what the caller appends, fits in budget_tokens
+    The most recent message is always kept.
+    """
+    if not history:
+        return []
+    head = history[0] if history[0]["role"] == "system" else None
+    rest = history[1:] if head else history
+    compacted = [
+        {**m, "content": strip_code_blocks(m["content"])} if m["role"] == "assistant" else m
+        for m in rest
+    ]
+    used = reserved_tokens + sum(map(message_tokens, compacted))
+    if head:
+        used += message_tokens(head)
+    drop = 0
+    while used > budget_tokens and drop < len(compacted) - 1:
+        used -= message_tokens(compacted[drop])
+        drop += 1
+    # Don't start the kept history with an orphaned assistant answer
+    while drop < len(compacted) - 1 and compacted[drop]["role"] == "assistant":
+        drop += 1
+    return ([head] if head else []) + compacted[drop:]
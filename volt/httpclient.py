@@ -0,0 +1,78 @@
+"""
+Shared requests.Session for the Netlify, GitHub and Auth0 APIs.
+
+make_session() returns a keep-alive session that retries transient errors
+(and 429 on any method), applies a default timeout and waits out per-host
+rate limits instead of failing.
+"""
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (5.0, 60.0)  # (connect, read) seconds
+
+
+class RateLimitRetry(Retry):
+    """
+    Retry idempotent methods on transient errors, and any method on 429
+    (the server refused the request, so resending it is safe).
+    """
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    Keep-alive adapter with a default timeout and per-host rate-limit awareness:
+    when a host answers 429 or reports X-RateLimit-Remaining: 0, later requests
+    to that host wait until Retry-After / X-RateLimit-Reset instead of failing.
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        self.blocked_until = {}
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        host = urlsplit(request.url).netloc
+        wait = self.blocked_until.get(host, 0) - time.time()
+        if wait > 0:
+            time.sleep(min(wait, 60))
+        resp = super().send(request, **kwargs)
+        self._note_rate_limit(host, resp)
+        return resp
+
+    def _note_rate_limit(self, host, resp):
+        h = resp.headers
+        until = None
+        if resp.status_code == 429 and h.get("Retry-After", "").isdigit():
+            until = time.time() + int(h["Retry-After"])
+        elif h.get("X-RateLimit-Remaining") == "0" and h.get("X-RateLimit-Reset", "").isdigit():
+            until = float(h["X-RateLimit-Reset"])
+        if until:
+            self.blocked_until[host] = until
+
+
+def make_session(timeout=DEFAULT_TIMEOUT, pool_size=16) -> requests.Session:
+    """
+    One Session reuses TCP+TLS connections (one pool per host) across every
+    thread that shares it.
+    """
+    retry = RateLimitRetry(
+        total=4,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = PooledHTTPAdapter(timeout=timeout, max_retries=retry, pool_connections=8, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,409 @@
+"""
+Netlify API client used to deploy generated apps.
+
+Netlify wraps one personal access token and a shared HTTP session
+(volt.httpclient). deploy() is the usual path: a file digest deploy that
+only uploads what Netlify doesn't already have, followed by a poll until
+the deploy is ready. The ZIP and Build API deploys are kept for callers
+that already have a zip.
+
+The digests of the last ready deploy of every site are kept in a JSON
+manifest file, so redeploying unchanged content only checks that the
+site still exists. Likewise the site of every app name (SiteCache), so
+ensure_site() only asks Netlify about names it hasn't seen.
+"""
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import uuid
+import zipfile
+
+from volt.files import write_atomic
+from volt.httpclient import make_session
+from volt.tracing import span
+
+API_BASE = "https://api.netlify.com/api/v1"
+SITE_FIELDS = ("id", "name", "url", "ssl_url")  # what SiteCache keeps of a site
+
+
+class SiteNotFound(RuntimeError):
+    """
+    The site no longer exists (e.g. deleted on Netlify since it was cached).
+    """
+
+
+class SiteCache:
+    """
+    App name -> site ({"id", "name", "url", "ssl_url"}) of the team's sites,
+    saved to a JSON file shared by every session and kept across restarts.
+    Names a lookup didn't find are remembered as missing for negative_ttl_s,
+    as is every name absent from a team listing (see replace_all) made
+    within that time.
+    """
+    def __init__(self, path=None, negative_ttl_s=600, clock=time.time):
+        self.path = path
+        self.negative_ttl_s = negative_ttl_s
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.sites = {}    # name -> site
+        self.missing = {}  # name -> when a lookup found nothing (0: unknown, whatever the listing says)
+        self.listed_at = 0.0
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                self.sites, self.missing, self.listed_at = saved["sites"], saved["missing"], saved["listed_at"]
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                pass
+
+    def get(self, name):
+        with self.lock:
+            return self.sites.get(name)
+
+    def known_missing(self, name) -> bool:
+        with self.lock:
+            if name in self.sites:
+                return False
+            since = self.missing.get(name, self.listed_at)
+            return self.clock() - since < self.negative_ttl_s
+
+    def put(self, name, site):
+        with self.lock:
+            self.sites[name] = {k: site.get(k) for k in SITE_FIELDS}
+            self.missing.pop(name, None)
+            self._save()
+
+    def put_missing(self, name):
+        with self.lock:
+            self.sites.pop(name, None)
+            self.missing[name] = self.clock()
+            self._save()
+
+    def forget(self, *names):
+        """
+        Drop what is known about names: the next ensure_site() looks them up.
+        """
+        with self.lock:
+            for name in names:
+                self.sites.pop(name, None)
+                self.missing[name] = 0.0
+            self._save()
+
+    def replace_all(self, sites, listed_at):
+        """
+        Sites of a complete team listing started at listed_at.
+        """
+        with self.lock:
+            self.sites = {s["name"]: {k: s.get(k) for k in SITE_FIELDS} for s in sites}
+            self.missing = {name: t for name, t in self.missing.items() if t > listed_at}
+            self.listed_at = listed_at
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        write_atomic(self.path, json.dumps({"sites": self.sites, "missing": self.missing,
+                                            "listed_at": self.listed_at}))
+
+
+def zip_from_html_str(html_str: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("index.html", html_str)  # in-memory file
+    buf.seek(0)
+    return buf.read()
+
+
+def site_files_from_html_str(html_str: str) -> dict:
+    """
+    Map deploy paths to file contents for a single-page app.
+    """
+    return {"/index.html": html_str.encode("utf-8")}
+
+
+def file_digests(files: dict) -> dict:
+    """
+    SHA1 of every file, as expected by the Netlify file digest API.
+    """
+    return {path: hashlib.sha1(content).hexdigest() for path, content in files.items()}
+
+
+def digests_fingerprint(digests: dict) -> str:
+    """
+    Single hash over all (path, sha1) pairs, used to detect no-op deploys.
+    """
+    h = hashlib.sha1()
+    for path in sorted(digests):
+        h.update(f"{path}\0{digests[path]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Netlify:
+    def __init__(self, pat, session=None, api_base=API_BASE, manifests_path=None, sites_path=None, poll_interval_s=1):
+        self.pat = pat
+        self.session = session or make_session()
+        self.api_base = api_base
+        self.manifests_path = manifests_path
+        self.manifests_lock = threading.Lock()
+        self.sites = SiteCache(sites_path)
+        self.poll_interval_s = poll_interval_s  # first wait of deploy()'s poll, see poll_deploy_ready
+
+    def headers(self, extra=None):
+        h = {
+            "Authorization": f"Bearer {self.pat}",
+            "User-Agent": "netlify-e2e-script (oss)",
+        }
+        if extra:
+            h.update(extra)
+        return h
+
+    def get_site_by_domain(self, domain: str):
+        """
+        Look up a Netlify site by its domain. Returns site JSON if found, else None.
+        """
+        r = self.session.get(f"{self.api_base}/sites/{domain}", headers=self.headers())
+        if r.status_code == 200:
+            return r.json()
+        return None
+
+    def create_site(self, team_slug: str, name: str, tool="volt⚡", session_id=None):
+        payload = {"account_slug": team_slug, "name": name, "created_via": tool}
+        if session_id:
+            payload["session_id"] = session_id
+        r = self.session.post(f"{self.api_base}/sites", json=payload,
+                              headers=self.headers({"Content-Type": "application/json"}))
+        if r.status_code >= 300:
+            raise RuntimeError(f"Create site failed: {r.status_code} {r.text}")
+        return r.json()
+
+    def list_team_sites(self, team_slug: str, per_page=100):
+        """
+        Every site of the team, one page at a time.
+        """
+        sites = []
+        page = 1
+        while True:
+            r = self.session.get(f"{self.api_base}/{team_slug}/sites", headers=self.headers(),
+                                 params={"page": page, "per_page": per_page})
+            if r.status_code >= 300:
+                raise RuntimeError(f"Listing sites failed: {r.status_code} {r.text}")
+            batch = r.json()
+            sites.extend(batch)
+            if len(batch) < per_page:
+                return sites
+            page += 1
+
+    def warm_site_cache(self, team_slug: str) -> int:
+        """
+        Fill the site cache from one listing of the team's sites.
+        """
+        listed_at = time.time()
+        with span("deploy.site_warm") as attrs:
+            sites = self.list_team_sites(team_slug)
+            attrs["sites"] = len(sites)
+        self.sites.replace_all(sites, listed_at)
+        return len(sites)
+
+    def ensure_site(self, team_slug: str, name: str, tool="Volt⚡"):
+        """
+        Netlify site called name, created if needed.
+        Returns (site, claim session id or None when the site already existed).
+        The site cache answers when it can; otherwise the lookup result
+        (site or miss) is cached.
+        """
+        with span("deploy.site_lookup") as attrs:
+            site = self.sites.get(name)
+            missing = site is None and self.sites.known_missing(name)
+            attrs["cached"] = site is not None or missing
+            if not attrs["cached"]:
+                site = self.get_site_by_domain(f"{name}.netlify.app")
+                if site:
+                    self.sites.put(name, site)
+                else:
+                    self.sites.put_missing(name)
+        if site:
+            return site, None
+        session_id = str(uuid.uuid4())
+        with span("deploy.site_create"):
+            try:
+                site = self.create_site(team_slug, name, tool=tool, session_id=session_id)
+            except RuntimeError:
+                # Cached as missing, but created since (e.g. by another process)
+                if not missing or not (site := self.get_site_by_domain(f"{name}.netlify.app")):
+                    raise
+                self.sites.put(name, site)
+                return site, None
+        self.sites.put(name, site)
+        return site, session_id
+
+    def deploy_zip_zipmethod(self, site_id, zip_bytes):
+        """
+        ZIP file deploy (official, simple): POST /sites/{site_id}/deploys
+        Content-Type: application/zip, body=zip
+        Returns deploy JSON with id, state, etc.
+        """
+        r = self.session.post(
+            f"{self.api_base}/sites/{site_id}/deploys",
+            headers=self.headers({"Content-Type": "application/zip"}),
+            data=zip_bytes,
+            timeout=120,
+        )
+        if r.status_code >= 300:
+            raise RuntimeError(f"ZIP deploy failed: {r.status_code} {r.text}")
+        return r.json()
+
+    def deploy_zip_buildapi(self, site_id, zip_bytes, title="Initial deploy"):
+        """
+        Build API (multipart form): POST /sites/{site_id}/builds with fields:
+          - title
+          - zip (application/zip)
+        """
+        files = {
+            "zip": ("site.zip", io.BytesIO(zip_bytes), "application/zip"),
+        }
+        data = {"title": title}
+        r = self.session.post(
+            f"{self.api_base}/sites/{site_id}/builds",
+            headers=self.headers(),
+            files=files,
+            data=data,
+            timeout=120,
+        )
+        if r.status_code >= 300:
+            raise RuntimeError(f"Build API deploy failed: {r.status_code} {r.text}")
+        return r.json()
+
+    def load_manifests(self) -> dict:
+        if not self.manifests_path:
+            return {}
+        try:
+            with open(self.manifests_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_manifest(self, site_id, digests: dict, deploy: dict):
+        """
+        Remember the file digests of the last *ready* deploy of a site.
+        Written atomically so concurrent sessions never read a torn file.
+        """
+        if not self.manifests_path:
+            return
+        with self.manifests_lock:
+            manifests = self.load_manifests()
+            manifests[site_id] = {
+                "fingerprint": digests_fingerprint(digests),
+                "files": digests,
+                "deploy_id": deploy.get("id"),
+                "url": deploy.get("ssl_url") or deploy.get("url"),
+            }
+            write_atomic(self.manifests_path, json.dumps(manifests))
+
+    def deploy_digest(self, site_id, files: dict, title="Volt deploy"):
+        """
+        File digest deploy: POST /sites/{site_id}/deploys with {"files": {path: sha1}},
+        then PUT only the files Netlify lists as `required`.
+        If the content matches the last ready deploy of this site (see
+        save_manifest) and that deploy is still the one the site publishes,
+        nothing is sent and it is returned with state 'ready' and
+        skipped=True. Raises SiteNotFound when the site is gone.
+        """
+        digests = file_digests(files)
+        last = self.load_manifests().get(site_id)
+        if last and last.get("fingerprint") == digests_fingerprint(digests):
+            # The site may have been deleted, or deployed to from elsewhere (Netlify
+            # itself once claimed, another process), since the manifest was written
+            r = self.session.get(f"{self.api_base}/sites/{site_id}", headers=self.headers())
+            if r.status_code == 404:
+                raise SiteNotFound(f"Site {site_id} not found")
+            published = (r.json().get("published_deploy") or {}).get("id") if r.status_code < 300 else None
+            if published is not None and published == last["deploy_id"]:
+                return {"id": last["deploy_id"], "state": "ready", "url": last["url"],
+                        "skipped": True, "digests": digests}
+
+        r = self.session.post(
+            f"{self.api_base}/sites/{site_id}/deploys",
+            headers=self.headers({"Content-Type": "application/json"}),
+            params={"title": title},
+            json={"files": digests},
+            timeout=60,
+        )
+        if r.status_code == 404:
+            raise SiteNotFound(f"Site {site_id} not found")
+        if r.status_code >= 300:
+            raise RuntimeError(f"Digest deploy failed: {r.status_code} {r.text}")
+        deploy = r.json()
+
+        # Upload each missing blob once, even if several paths share its content
+        required = set(deploy.get("required") or [])
+        for path, content in files.items():
+            sha = digests[path]
+            if sha not in required:
+                continue
+            up = self.session.put(
+                f"{self.api_base}/deploys/{deploy['id']}/files/{path.lstrip('/')}",
+                headers=self.headers({"Content-Type": "application/octet-stream"}),
+                data=content,
+                timeout=120,
+            )
+            if up.status_code >= 300:
+                raise RuntimeError(f"Upload of {path} failed: {up.status_code} {up.text}")
+            required.discard(sha)
+
+        deploy["digests"] = digests
+        return deploy
+
+    def poll_deploy_ready(self, deploy_id, timeout_s=120, interval_s=1, max_interval_s=10, backoff=1.5, cancel=None):
+        """
+        Poll /deploys/{deploy_id} until state == 'ready' or timeout.
+        The wait starts at interval_s and grows by `backoff` up to max_interval_s,
+        with jitter so concurrent deploys don't poll in lockstep. It drops back
+        to interval_s whenever the state changes.
+        Setting the optional `cancel` threading.Event stops the wait early.
+        """
+        deadline = time.time() + timeout_s
+        last_state = None
+        delay = interval_s
+        while time.time() < deadline:
+            r = self.session.get(f"{self.api_base}/deploys/{deploy_id}", headers=self.headers())
+            if r.status_code >= 300:
+                raise RuntimeError(f"Poll deploy failed: {r.status_code} {r.text}")
+            state = r.json().get("state")
+            if state == "error":
+                raise RuntimeError(f"Deploy failed: {r.json().get('error_message') or state}")
+            if state != last_state:
+                print(f"- Deploy state: {state}")
+                last_state = state
+                delay = interval_s
+            if state == "ready":
+                return r.json()
+            sleep_s = max(0, min(delay * random.uniform(0.5, 1.0), deadline - time.time()))
+            if cancel is None:
+                time.sleep(sleep_s)
+            elif cancel.wait(sleep_s):
+                raise RuntimeError("Deploy cancelled")
+            delay = min(delay * backoff, max_interval_s)
+        raise TimeoutError("Timed out waiting for deploy to be ready")
+
+    def deploy(self, site_id, files: dict, title="Volt deploy", timeout_s=120, cancel=None, on_building=None):
+        """
+        Digest deploy of files ({path: bytes}) to site_id, then wait until it
+        is ready. on_building() is called once the upload is done and Netlify
+        is processing the deploy. Returns the ready deploy JSON (skipped=True
+        when the content was already live).
+        """
+        with span("deploy.upload", files=len(files)) as upload:
+            deploy = self.deploy_digest(site_id, files, title=title)
+            upload["skipped"] = bool(deploy.get("skipped"))
+        if deploy.get("state") == "ready":
+            return deploy
+        if on_building:
+            on_building()
+        with span("deploy.poll_wait"):
+            ready = self.poll_deploy_ready(deploy["id"], timeout_s=timeout_s, interval_s=self.poll_interval_s,
+                                           cancel=cancel)
+        self.save_manifest(site_id, deploy["digests"], ready)
+        return ready
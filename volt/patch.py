@@ -0,0 +1,122 @@
+"""
+Apply the model's edit blocks to the current HTML.
+
+In edit mode the model answers follow-up prompts with search/replace
+blocks (or a unified diff) instead of the whole document:
+
+    <<<<<<< SEARCH
+    <button class="btn">Go</button>
+    =======
+    <button class="btn blue">Go</button>
+    >>>>>>> REPLACE
+
+parse_edits() turns either format into (search, replace) pairs and
+apply_edits() applies them, raising PatchError when one doesn't match the
+document exactly once so the caller can ask for a full regeneration.
+"""
+
+SEARCH, DIVIDER, REPLACE = "<<<<<<< SEARCH", "=======", ">>>>>>> REPLACE"
+
+
+class PatchError(ValueError):
+    pass
+
+
+def parse_edits(text):
+    """
+    Return the list of (search, replace) edits found in a model answer.
+    """
+    return parse_search_replace(text) or parse_unified_diff(text)
+
+
+def parse_search_replace(text):
+    edits = []
+    search = replace = None
+    for line in text.splitlines():
+        marker = line.strip()
+        if marker == SEARCH:
+            search, replace = [], None
+        elif search is not None and replace is None and marker == DIVIDER:
+            replace = []
+        elif replace is not None and marker == REPLACE:
+            edits.append(("\n".join(search), "\n".join(replace)))
+            search = replace = None
+        elif replace is not None:
+            replace.append(line)
+        elif search is not None:
+            search.append(line)
+    return edits
+
+
+def parse_unified_diff(text):
+    """
+    Each @@ hunk becomes one edit: context and '-' lines are searched for,
+    context and '+' lines replace them. Line numbers are ignored.
+    """
+    edits = []
+    search = replace = None
+    for line in text.splitlines():
+        if line.startswith("@@"):
+            if search:
+                edits.append(("\n".join(search), "\n".join(replace)))
+            search, replace = [], []
+        elif search is None or line.startswith(("---", "+++")):
+            continue
+        elif line.startswith("-"):
+            search.append(line[1:])
+        elif line.startswith("+"):
+            replace.append(line[1:])
+        elif line.startswith(" ") or line == "":
+            search.append(line[1:])
+            replace.append(line[1:])
+        else:  # end of the diff (closing fence, prose)
+            if search:
+                edits.append(("\n".join(search), "\n".join(replace)))
+            search = replace = None
+    if search:
+        edits.append(("\n".join(search), "\n".join(replace)))
+    return edits
+
+
+def apply_edits(html, edits):
+    """
+    Apply edits in order. A SEARCH text must match exactly once; when it
+    doesn't match at all, lines are compared again ignoring indentation
+    and trailing spaces, which models often get wrong.
+    """
+    if not edits:
+        raise PatchError("no edit blocks")
+    for i, (search, replace) in enumerate(edits, 1):
+        if not search.strip():
+            raise PatchError(f"edit {i}: empty SEARCH block")
+        count = html.count(search)
+        if count > 1:
+            raise PatchError(f"edit {i}: SEARCH text matches {count} places")
+        if count == 1:
+            html = html.replace(search, replace, 1)
+            continue
+        span = _find_lines_loosely(html, search)
+        if span is None:
+            raise PatchError(f"edit {i}: SEARCH text not found")
+        html = html[:span[0]] + replace + html[span[1]:]
+    return html
+
+
+def _find_lines_loosely(html, search):
+    """
+    (start, end) offsets of the only run of whole lines in html equal to the
+    lines of search after strip(), or None.
+    """
+    wanted = [line.strip() for line in search.strip("\n").split("\n")]
+    lines = html.split("\n")
+    stripped = [line.strip() for line in lines]
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    hits = [i for i in range(len(lines) - len(wanted) + 1) if stripped[i:i + len(wanted)] == wanted]
+    if len(hits) > 1:
+        raise PatchError(f"SEARCH text matches {len(hits)} places")
+    if not hits:
+        return None
+    start = hits[0]
+    return offsets[start], offsets[start + len(wanted)] - 1
@@ -0,0 +1,172 @@
+"""
+Cache of model responses for repeated prompts.
+
+Entries are keyed by cache_key(): a hash of the whole model input (system
+prompt and compacted history), with whitespace normalized, plus the model
+and effort. A fresh app with the same starter prompt therefore hits;
+anything that changes what the model would see does not.
+
+ResponseCache keeps a bounded LRU in memory in front of a directory of
+zlib-compressed JSON files. Entries expire after ttl_s, and the oldest
+files are removed once the directory grows past max_disk_bytes.
+record() wraps a live event stream (see volt.generate.stream_events) and
+stores the response once the stream completes; replay_events() plays a
+stored response back as the same events.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from volt.files import write_atomic
+
+
+def cache_key(input_messages, model, effort) -> str:
+    normalized = [[m["role"], " ".join(str(m["content"]).split())] for m in input_messages]
+    return hashlib.sha256(json.dumps([normalized, model, effort]).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, directory, max_entries=256, max_disk_bytes=200 << 20, ttl_s=7 * 86400, clock=time.time):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> entry, least recently used first
+        self.disk_bytes = None       # measured on first write
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        """
+        Stored entry for key ({"answer", "reasoning", "model", "effort", "ts"}), or None.
+        """
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+        if entry is None:
+            entry = self._read(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is not None and self.clock() - entry["ts"] > self.ttl_s:
+            self.delete(key)
+            entry = None
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        entry = {**entry, "ts": self.clock()}
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def delete(self, key):
+        with self.lock:
+            self.memory.pop(key, None)
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self.lock:
+            if self.disk_bytes is not None:
+                self.disk_bytes -= size
+
+    def record(self, key, events, model, effort):
+        """
+        Pass events through, storing the response if the stream completes
+        with an answer and no refusal.
+        """
+        parts = {"answer": [], "reasoning": []}
+        refused = False
+        for kind, text in events:
+            if kind in parts:
+                parts[kind].append(text)
+            elif kind == "refusal":
+                refused = True
+            yield kind, text
+        answer = "".join(parts["answer"])
+        if answer and not refused:
+            self.put(key, {"answer": answer, "reasoning": "".join(parts["reasoning"]),
+                           "model": model, "effort": effort})
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def _write(self, key, entry):
+        path = self._path(key)
+        data = zlib.compress(json.dumps(entry).encode("utf-8"))
+        write_atomic(path, data)
+        with self.lock:
+            if self.disk_bytes is None:
+                self.disk_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self.disk_bytes += len(data)
+            if self.disk_bytes > self.max_disk_bytes:
+                self._shrink()
+
+    def _files(self):
+        """
+        (mtime, size, path) of every stored file.
+        """
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, path
+
+    def _shrink(self):
+        # Oldest first, down to 90% so this doesn't run on every write
+        for _, size, path in sorted(self._files()):
+            if self.disk_bytes <= self.max_disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.disk_bytes -= size
+            self.memory.pop(os.path.basename(path), None)
+
+
+def replay_events(entry, timing, chunk_chars=512):
+    """
+    A cached response as stream_events() would yield it, filling `timing`
+    (with "cached": True, "model" and "effort").
+    """
+    timing["overall_start"] = time.time()
+    timing.update(cached=True, model=entry["model"], effort=entry["effort"])
+    if entry["reasoning"]:
+        timing["reason_start"] = time.time()
+        yield "reasoning", entry["reasoning"]
+        timing["reason_end"] = time.time()
+    answer = entry["answer"]
+    timing["first_token"] = time.time()
+    for i in range(0, len(answer), chunk_chars):
+        yield "answer", answer[i:i + chunk_chars]
+    timing["overall_end"] = time.time()
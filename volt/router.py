@@ -0,0 +1,88 @@
+"""
+Per-request choice of model and reasoning effort.
+
+features() describes a chat turn with cheap local measurements (no model
+call): prompt length, edit vs. new app, size of the current app and
+history depth. route() walks a policy table and returns the first rule
+whose conditions all hold:
+
+    {"rule": "tweak", "when": {"editing": True, "max_prompt_chars": 160}, "effort": "minimal"}
+
+Conditions are `editing` (bool) and min_/max_ bounds on any numeric
+feature (`prompt_chars`, `html_chars`, `turns`). A rule without "model"
+uses the caller's default model. record_decision() logs the decision with
+the latency that followed as a route.<rule> span, so the admin page
+shows p50/p95 per rule for tuning the table. hedge_backups() picks the
+hedging candidates that fit a decision.
+"""
+from volt import tracing
+
+EFFORTS = ("minimal", "low", "medium", "high")  # fastest first
+
+DEFAULT_POLICY = [
+    # Small edits ("make the button blue") don't need deliberate reasoning
+    {"rule": "tweak", "when": {"editing": True, "max_prompt_chars": 160, "max_html_chars": 60000, "max_turns": 20},
+     "effort": "minimal"},
+    # A long prompt in edit mode is closer to a rewrite
+    {"rule": "rework", "when": {"editing": True, "min_prompt_chars": 400}, "effort": "medium"},
+    {"rule": "edit", "when": {"editing": True}, "effort": "low"},
+    {"rule": "new", "when": {}, "effort": "medium"},
+]
+
+
+def features(prompt: str, editing: bool, html: str, history: list) -> dict:
+    return {
+        "editing": editing,
+        "prompt_chars": len(prompt),
+        "html_chars": len(html) if editing else 0,
+        "turns": sum(1 for m in history if m["role"] == "user"),
+    }
+
+
+def matches(when, feats) -> bool:
+    for key, want in when.items():
+        if key.startswith("min_"):
+            if feats[key[4:]] < want:
+                return False
+        elif key.startswith("max_"):
+            if feats[key[4:]] > want:
+                return False
+        elif feats[key] != want:
+            return False
+    return True
+
+
+def route(feats: dict, policy=DEFAULT_POLICY, default_model=None) -> dict:
+    """
+    {"rule", "model", "effort", "features"} of the first matching rule
+    (medium effort on the default model if none matches).
+    """
+    for rule in policy:
+        if matches(rule.get("when", {}), feats):
+            return {"rule": rule["rule"], "model": rule.get("model", default_model),
+                    "effort": rule.get("effort", "medium"), "features": feats}
+    return {"rule": "default", "model": default_model, "effort": "medium", "features": feats}
+
+
+def hedge_backups(routed: dict, candidates: list) -> list:
+    """
+    Candidates ({"model", "effort"}) that may back up the routed one: the
+    others with no higher reasoning effort, so a backup is never slower
+    than the request it hedges. Unknown efforts count as the slowest.
+    """
+    rank = {effort: i for i, effort in enumerate(EFFORTS)}
+    limit = rank.get(routed["effort"], len(EFFORTS))
+    return [c for c in candidates if c != routed and rank.get(c["effort"], len(EFFORTS)) <= limit]
+
+
+def record_decision(decision: dict, timing: dict):
+    """
+    Log a routed turn with its time to first token and total time.
+    """
+    start, end = timing["overall_start"], timing["overall_end"]
+    if not (start and end):
+        return
+    first = timing["first_token"]
+    tracing.record(f"route.{decision['rule']}", end - start, start=start,
+                   model=timing.get("model", decision["model"]), effort=timing.get("effort", decision["effort"]),
+                   ttft_s=round(first - start, 3) if first else None, **decision["features"])
@@ -0,0 +1,218 @@
+"""
+Persistent per-user session state.
+
+A session is keyed by its owner (the authenticated user) and app name.
+It is stored as named fields (JSON) plus the chat history, one row per
+message, so a turn writes only the fields that changed and the messages
+it appended (SessionWriter). The store also holds content-addressed
+objects shared by all sessions (the app versions of volt.versions).
+SessionStore is the interface a backend implements; SQLiteSessionStore
+keeps everything in one local SQLite database in WAL mode.
+
+LiveSessions holds the large parts of the sessions loaded in this
+process and drops idle ones from memory; they are loaded again from the
+store on their next run.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    def load(self, owner, app=None):
+        """
+        {"app", "fields", "messages"} of owner's app (default: the one
+        saved last), or None.
+        """
+        raise NotImplementedError
+
+    def write(self, owner, app, fields, start, messages):
+        """
+        Set fields ({name: JSON text}) and replace the messages from index
+        `start` on with `messages`, atomically.
+        """
+        raise NotImplementedError
+
+    def rename(self, owner, old, new):
+        """
+        Move an app to a new name, replacing any app saved under it.
+        """
+        raise NotImplementedError
+
+    def put_object(self, key, data):
+        """
+        Store bytes under key, unless something is already stored there:
+        keys are content hashes, so it is the same data.
+        """
+        raise NotImplementedError
+
+    def get_object(self, key) -> bytes:
+        """
+        Bytes stored under key; KeyError if there are none.
+        """
+        raise NotImplementedError
+
+
+class SQLiteSessionStore(SessionStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS apps (owner TEXT, app TEXT, updated REAL, PRIMARY KEY (owner, app));
+        CREATE TABLE IF NOT EXISTS fields (owner TEXT, app TEXT, name TEXT, value TEXT,
+                                           PRIMARY KEY (owner, app, name));
+        CREATE TABLE IF NOT EXISTS messages (owner TEXT, app TEXT, seq INTEGER, message TEXT,
+                                             PRIMARY KEY (owner, app, seq));
+        CREATE TABLE IF NOT EXISTS objects (key TEXT PRIMARY KEY, data BLOB);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()  # one connection per thread
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self.db() as db:
+            db.executescript(self.SCHEMA)
+
+    def db(self) -> sqlite3.Connection:
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; a crash loses at most the last turns
+            self.local.db = db
+        return db
+
+    def load(self, owner, app=None):
+        db = self.db()
+        if app is None:
+            row = db.execute("SELECT app FROM apps WHERE owner = ? ORDER BY updated DESC LIMIT 1", (owner,)).fetchone()
+            if row is None:
+                return None
+            app = row[0]
+        elif db.execute("SELECT 1 FROM apps WHERE owner = ? AND app = ?", (owner, app)).fetchone() is None:
+            return None
+        fields = {name: json.loads(value) for name, value in
+                  db.execute("SELECT name, value FROM fields WHERE owner = ? AND app = ?", (owner, app))}
+        messages = [json.loads(m) for m, in
+                    db.execute("SELECT message FROM messages WHERE owner = ? AND app = ? ORDER BY seq", (owner, app))]
+        return {"app": app, "fields": fields, "messages": messages}
+
+    def write(self, owner, app, fields, start, messages):
+        with self.db() as db:
+            db.execute("INSERT OR REPLACE INTO apps VALUES (?, ?, ?)", (owner, app, time.time()))
+            db.executemany("INSERT OR REPLACE INTO fields VALUES (?, ?, ?, ?)",
+                           [(owner, app, name, value) for name, value in fields.items()])
+            db.execute("DELETE FROM messages WHERE owner = ? AND app = ? AND seq >= ?", (owner, app, start))
+            db.executemany("INSERT INTO messages VALUES (?, ?, ?, ?)",
+                           [(owner, app, start + i, json.dumps(m)) for i, m in enumerate(messages)])
+
+    def rename(self, owner, old, new):
+        with self.db() as db:
+            for table in ("apps", "fields", "messages"):
+                db.execute(f"DELETE FROM {table} WHERE owner = ? AND app = ?", (owner, new))
+                db.execute(f"UPDATE {table} SET app = ? WHERE owner = ? AND app = ?", (new, owner, old))
+
+    def put_object(self, key, data):
+        with self.db() as db:
+            db.execute("INSERT OR IGNORE INTO objects VALUES (?, ?)", (key, data))
+
+    def get_object(self, key) -> bytes:
+        row = self.db().execute("SELECT data FROM objects WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+
+class SessionWriter:
+    """
+    Saves one session, remembering what it last wrote so that save()
+    sends only changed fields and the chat messages from the first one
+    that differs (usually just the new turn).
+    """
+    def __init__(self, store, owner, app, saved=None):
+        self.store = store
+        self.owner = owner
+        self.app = app
+        self.fields = {name: json.dumps(value, sort_keys=True) for name, value in (saved or {}).get("fields", {}).items()}
+        self.messages = list((saved or {}).get("messages", []))
+
+    def save(self, app, fields, messages) -> bool:
+        """
+        Write what changed since the last save; True if anything was written.
+        """
+        if app != self.app:
+            self.store.rename(self.owner, self.app, app)
+            self.app = app
+        changed = {}
+        for name, value in fields.items():
+            encoded = json.dumps(value, sort_keys=True)
+            if self.fields.get(name) != encoded:
+                changed[name] = encoded
+        start = 0
+        for old, new in zip(self.messages, messages):
+            if old is not new and old != new:
+                break
+            start += 1
+        if not changed and start == len(messages) == len(self.messages):
+            return False
+        self.store.write(self.owner, self.app, changed, start, messages[start:])
+        self.fields.update(changed)
+        self.messages = list(messages)
+        return True
+
+
+class LiveSessions:
+    """
+    The large, reloadable state of the sessions this process has loaded
+    (chat history, versions...), keyed by (owner, app) rather than kept in
+    Streamlit's session state, with the least recently used first. get()
+    on every run marks an entry active; entries not used for more than
+    idle_s, and the oldest past max_entries, are dropped, and a missing
+    entry tells the session to load its state again from the store.
+    """
+    def __init__(self, idle_s, max_entries=1000, clock=time.monotonic):
+        self.idle_s = idle_s
+        self.max_entries = max_entries
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> [state, last use]
+
+    def get(self, key):
+        with self.lock:
+            now = self.clock()
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[1] = now
+                self.entries.move_to_end(key)
+            self._evict_idle(now)
+            return entry[0] if entry is not None else None
+
+    def put(self, key, state):
+        with self.lock:
+            self.entries[key] = [state, self.clock()]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def rename(self, old, new):
+        """
+        Move the entry of `old` to `new` (an app was renamed).
+        """
+        with self.lock:
+            entry = self.entries.pop(old, None)
+            if entry is not None:
+                self.entries[new] = entry
+
+    def evict_idle(self) -> int:
+        with self.lock:
+            return self._evict_idle(self.clock())
+
+    def _evict_idle(self, now):
+        evicted = 0
+        while self.entries:
+            key, (_, last) = next(iter(self.entries.items()))
+            if now - last <= self.idle_s:
+                break
+            del self.entries[key]
+            evicted += 1
+        return evicted
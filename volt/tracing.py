@@ -0,0 +1,102 @@
+"""
+Per-stage latency spans.
+
+span() times a block of code and record() stores a duration measured
+elsewhere (time-to-first-token, for instance). Spans are appended, one
+JSON object per line, to the file given to configure(); nothing is
+recorded until then. summarize() turns them into p50/p95/p99 per stage
+for the admin page.
+"""
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_path = None
+
+
+def configure(path):
+    """
+    Append spans to path (a JSONL file). Safe to call on every script run.
+    """
+    global _path
+    if path != _path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _path = path
+
+
+def record(name, duration_s, start=None, **attrs):
+    if _path is None or duration_s is None:
+        return
+    line = json.dumps({"name": name, "ts": start or time.time() - duration_s,
+                       "duration_s": round(duration_s, 6), **attrs})
+    with _lock, open(_path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """
+    Time the block as span `name`. The yielded dict can be used to add
+    attributes; error=True is added when the block raises.
+    """
+    start, t0 = time.time(), time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        attrs["error"] = True
+        raise
+    finally:
+        record(name, time.perf_counter() - t0, start=start, **attrs)
+
+
+def load(path=None, since=None):
+    """
+    Spans from path (default: the configured file), optionally only those
+    that started at or after the `since` timestamp.
+    """
+    path = path or _path
+    spans = []
+    if not path or not os.path.exists(path):
+        return spans
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                s = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            if since is None or s["ts"] >= since:
+                spans.append(s)
+    return spans
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(spans):
+    """
+    One row per span name: count, errors, p50/p95/p99 and max in seconds.
+    """
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s["name"], []).append(s)
+    rows = []
+    for name in sorted(by_name):
+        values = sorted(s["duration_s"] for s in by_name[name])
+        rows.append({
+            "stage": name,
+            "count": len(values),
+            "errors": sum(1 for s in by_name[name] if s.get("error")),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+        })
+    return rows
@@ -0,0 +1,184 @@
+"""
+Content-addressed version history of a session's app.
+
+Every generated HTML is stored once under the sha256 of its content.
+Most versions are kept as a compressed line delta against the version
+they were made from, with a full snapshot every `snapshot_every` versions
+so rebuilding one never replays more than that many deltas. Past
+`max_memory_bytes`, the oldest versions are written (zlib-compressed) to
+an object store shared by all sessions and dropped from memory. The
+object store is anything with put_object()/get_object(), such as
+volt.sessions.SessionStore, so that every replica reading the session
+database also finds its versions, or a DirectoryObjectStore (one file per
+hash) when nothing else is configured.
+
+The timeline is a list of hashes plus a cursor, so undo/redo only move
+the cursor; adding a version after an undo discards the redo branch, as
+in an editor. state() and restore() save and rebuild a store from its
+timeline once persist() has written every version to the object store.
+"""
+import difflib
+import hashlib
+import json
+import os
+import zlib
+
+from volt.files import write_atomic
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DirectoryObjectStore:
+    """
+    Objects as files under a local directory, named by their key.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def put_object(self, key, data):
+        path = self._path(key)
+        if not os.path.exists(path):
+            write_atomic(path, data)
+
+    def get_object(self, key) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def _path(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+
+class VersionStore:
+    def __init__(self, object_store, max_memory_bytes=1 << 20, snapshot_every=8):
+        self.object_store = object_store
+        self.max_memory_bytes = max_memory_bytes
+        self.snapshot_every = snapshot_every
+        self.objects = {}  # hash -> {"kind": "snap"|"delta"|"stored", "depth", "data", "base"}
+        self.memory_bytes = 0
+        self.timeline = []
+        self.cursor = -1
+        self.persisted = set()  # hashes known to be in the object store
+
+    def __len__(self):
+        return len(self.timeline)
+
+    @property
+    def current(self):
+        return self.timeline[self.cursor] if self.timeline else None
+
+    @property
+    def can_undo(self):
+        return self.cursor > 0
+
+    @property
+    def can_redo(self):
+        return self.cursor < len(self.timeline) - 1
+
+    def add(self, text):
+        """
+        Make text the current version and return its hash. Identical
+        content is stored once; re-adding the current version is a no-op.
+        """
+        h = content_hash(text)
+        if h == self.current:
+            return h
+        if h not in self.objects:
+            self._store(h, text)
+        del self.timeline[self.cursor + 1:]
+        self.timeline.append(h)
+        self.cursor += 1
+        self._spill()
+        return h
+
+    def state(self) -> dict:
+        return {"timeline": list(self.timeline), "cursor": self.cursor}
+
+    @classmethod
+    def restore(cls, object_store, state, **kwargs):
+        """
+        Store with the timeline of state(), reading versions from the object
+        store when they are first needed.
+        """
+        store = cls(object_store, **kwargs)
+        store.timeline = list(state["timeline"])
+        store.cursor = state["cursor"]
+        store.objects = {h: {"kind": "stored", "depth": 0} for h in store.timeline}
+        store.persisted = set(store.timeline)
+        return store
+
+    def persist(self):
+        """
+        Write every version not yet there to the object store (keeping the
+        in-memory copies), so the timeline can be restored elsewhere.
+        """
+        for h in self.timeline:
+            if h not in self.persisted:
+                self._write(h)
+
+    def undo(self):
+        if self.can_undo:
+            self.cursor -= 1
+        return self.current
+
+    def redo(self):
+        if self.can_redo:
+            self.cursor += 1
+        return self.current
+
+    def get(self, h):
+        """
+        Content of version h (KeyError if this session never stored it).
+        """
+        rec = self.objects[h]
+        if rec["kind"] == "snap":
+            return zlib.decompress(rec["data"]).decode("utf-8")
+        if rec["kind"] == "stored":
+            return zlib.decompress(self.object_store.get_object(h)).decode("utf-8")
+        lines = self.get(rec["base"]).splitlines(keepends=True)
+        for i1, i2, new in reversed(json.loads(zlib.decompress(rec["data"]))):
+            lines[i1:i2] = new
+        return "".join(lines)
+
+    def diff(self, a, b, context=3):
+        """
+        Unified diff from version a to version b.
+        """
+        return "".join(difflib.unified_diff(
+            self.get(a).splitlines(keepends=True), self.get(b).splitlines(keepends=True),
+            fromfile=a[:8], tofile=b[:8], n=context,
+        ))
+
+    def _store(self, h, text):
+        snapshot = zlib.compress(text.encode("utf-8"))
+        rec = {"kind": "snap", "depth": 0, "data": snapshot}
+        base = self.current
+        if base and self.objects[base]["depth"] + 1 < self.snapshot_every:
+            old, new = self.get(base).splitlines(keepends=True), text.splitlines(keepends=True)
+            ops = [(i1, i2, new[j1:j2])
+                   for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+                   if tag != "equal"]
+            delta = zlib.compress(json.dumps(ops).encode("utf-8"))
+            if len(delta) < len(snapshot):
+                rec = {"kind": "delta", "depth": self.objects[base]["depth"] + 1, "data": delta, "base": base}
+        self.objects[h] = rec
+        self.memory_bytes += len(rec["data"])
+
+    def _spill(self):
+        for h, rec in self.objects.items():
+            if self.memory_bytes <= self.max_memory_bytes:
+                break
+            if rec["kind"] == "stored" or h == self.current:
+                continue
+            self._write(h)
+            self.memory_bytes -= len(rec["data"])
+            self.objects[h] = {"kind": "stored", "depth": 0}
+
+    def _write(self, h):
+        if h not in self.persisted:
+            self.object_store.put_object(h, zlib.compress(self.get(h).encode("utf-8")))
+        self.persisted.add(h)